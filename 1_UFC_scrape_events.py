@@ -4,14 +4,108 @@ import pandas as pd
 import time
 import argparse
 import os
-from typing import Set, List, Dict, Optional
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Set, List, Dict, Optional, Tuple
+from ufc_http import HostRateLimiter, configure_cache, fetch_html
+from ufc_cache import DEFAULT_CACHE_DIR, ResponseCache
+from ufc_parse import try_parse_fight_preview
+from ufc_storage import export_excel, open_store
 
-def scrape_fight_links_from_event(event_url):
-    """Scrape all fight links from a specific event page"""
+EVENTS_URL = "http://ufcstats.com/statistics/events/completed"
+
+def parse_event_row(row, link_selector: str = 'td a.b-link') -> Optional[Dict]:
+    """
+    Extract the link, name, date and location of an event from a row of the events listing
+    Returns None for rows without an event link
+    """
+    event_link = row.select_one(link_selector)
+    if not event_link:
+        return None
+    event_date = row.select_one('span.b-statistics__date')
+    event_location = row.select_one('td.b-statistics__table-col_style_big-top-padding')
+    return {
+        'event_url': event_link['href'],
+        'event_name': event_link.text.strip(),
+        'event_date': event_date.text.strip() if event_date else None,
+        'event_location': event_location.text.strip() if event_location else None,
+    }
+
+def parse_event_listing(html: str) -> Tuple[Optional[object], List[Dict]]:
+    """
+    Split a page of the events listing into the upcoming event row (None if
+    the page has none) and the completed events, newest first
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # The first row is the upcoming event
+    upcoming_row = soup.select_one('tr.b-statistics__table-row_type_first')
+    
+    events = []
+    for row in soup.select('tr.b-statistics__table-row'):
+        if row is upcoming_row:
+            continue
+        event = parse_event_row(row)
+        if event:
+            events.append(event)
+    
+    return upcoming_row, events
+
+def fetch_event_listing(known_events: Optional[Set[str]] = None, num_events: Optional[int] = None,
+                        max_pages: Optional[int] = None) -> Tuple[Optional[object], List[Dict]]:
+    """
+    Fetch the events listing: the upcoming event row and the completed events, newest first
+    
+    Parameters:
+    known_events (Set[str], optional): Event links that are already stored. When given, the
+        listing is walked page by page and stops at the first known event, so only the new
+        events are returned. Otherwise the whole listing is downloaded in a single request.
+    num_events (int, optional): Stop once this many events have been found.
+    max_pages (int, optional): Maximum number of listing pages to fetch.
+    """
+    if known_events is None and max_pages is None:
+        upcoming_row, events = parse_event_listing(fetch_html(f"{EVENTS_URL}?page=all"))
+        return upcoming_row, events[:num_events] if num_events else events
+    
+    if known_events is None:
+        known_events = set()
+    
+    upcoming_row = None
+    events = []
+    seen = set()
+    page = 1
+    while max_pages is None or page <= max_pages:
+        page_upcoming, page_events = parse_event_listing(fetch_html(f"{EVENTS_URL}?page={page}"))
+        if page == 1:
+            upcoming_row = page_upcoming
+        
+        # Past the last page the listing is empty (or repeats itself)
+        page_events = [event for event in page_events if event['event_url'] not in seen]
+        if not page_events:
+            break
+        
+        for event in page_events:
+            if event['event_url'] in known_events:
+                print(f"Reached already processed event {event['event_name']} on listing page {page}")
+                return upcoming_row, events
+            seen.add(event['event_url'])
+            events.append(event)
+            if num_events and len(events) >= num_events:
+                return upcoming_row, events
+        page += 1
+    
+    return upcoming_row, events
+
+def scrape_fight_links_from_event(event_url, immutable: bool = False):
+    """
+    Scrape all fight links from a specific event page
+    
+    Parameters:
+    event_url (str): URL of the event page
+    immutable (bool): The event is completed, so a cached copy of the page can be reused as is
+    """
     try:
-        response = requests.get(event_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(fetch_html(event_url, immutable=immutable), 'html.parser')
         
         # Find all fight rows
         fight_rows = soup.select('tr.b-fight-details__table-row[data-link]')
@@ -46,98 +140,80 @@ def scrape_fight_links_from_event(event_url):
         print(f"Error fetching event {event_url}: {e}")
         return []
 
-def get_already_processed_events(output_file: str) -> Set[str]:
+def get_already_processed_keys(store, column: str, label: str) -> Set[str]:
     """
-    Check if the output file exists and extract the event links that have already been processed.
-    Returns a set of event links that should be skipped.
+    Return the unique values of `column` from the key index of the data store,
+    without reading the data itself.
+    Returns an empty set if the store doesn't exist or has no such column.
     """
-    processed_events = set()
+    processed = set()
     
-    if os.path.exists(output_file):
+    if store.exists():
         try:
-            print(f"Found existing data file: {output_file}")
-            # Read the file efficiently - only load the event_link column
-            existing_data = pd.read_excel(output_file)
-            
-            # Check if event_link column exists
-            if 'event_link' in existing_data.columns:
-                # Extract unique event links
-                processed_events = set(existing_data['event_link'].unique())
-                print(f"Found {len(processed_events)} already processed events")
-                
-                # Debug: Print first few event links to verify
-                if processed_events:
-                    print("Sample of processed event links:")
-                    for link in list(processed_events)[:3]:
-                        print(f"  - {link}")
-            else:
-                print(f"Warning: 'event_link' column not found in {output_file}")
-                print(f"Available columns: {existing_data.columns.tolist()}")
+            print(f"Found existing data: {store}")
+            processed = store.keys(column)
+            print(f"Found {len(processed)} already processed {label}")
+            
+            # Debug: Print first few keys to verify
+            if processed:
+                print(f"Sample of processed {label}:")
+                for key in list(processed)[:3]:
+                    print(f"  - {key}")
+            elif column not in store.columns():
+                print(f"Warning: '{column}' column not found in {store}")
+                print(f"Available columns: {store.columns()}")
         except Exception as e:
-            print(f"Error reading existing data file: {e}")
+            print(f"Error reading existing data: {e}")
     else:
-        print(f"No existing data file found at {output_file}")
+        print(f"No existing data found at {store}")
     
-    return processed_events
+    return processed
 
-def get_already_processed_fights(output_file: str) -> Set[str]:
+def get_already_processed_events(store) -> Set[str]:
+    """
+    Extract the event links that have already been processed.
+    Returns a set of event links that should be skipped.
     """
-    Check if the output file exists and extract the fight links that have already been processed.
+    return get_already_processed_keys(store, 'event_link', 'event links')
+
+def get_already_processed_fights(store) -> Set[str]:
+    """
+    Extract the fight links that have already been processed.
     Returns a set of fight links that should be skipped.
     """
-    processed_fights = set()
-    
-    if os.path.exists(output_file):
-        try:
-            print(f"Found existing data file: {output_file}")
-            # Read the file efficiently
-            existing_data = pd.read_excel(output_file)
-            
-            # Check if fight_link column exists
-            if 'fight_link' in existing_data.columns:
-                # Extract unique fight links
-                processed_fights = set(existing_data['fight_link'].unique())
-                print(f"Found {len(processed_fights)} already processed fights")
-                
-                # Debug: Print first few fight links to verify
-                if processed_fights:
-                    print("Sample of processed fight links:")
-                    for link in list(processed_fights)[:3]:
-                        print(f"  - {link}")
-            else:
-                print(f"Warning: 'fight_link' column not found in {output_file}")
-                print(f"Available columns: {existing_data.columns.tolist()}")
-        except Exception as e:
-            print(f"Error reading existing data file: {e}")
-    else:
-        print(f"No existing data file found at {output_file}")
-    
-    return processed_fights
+    return get_already_processed_keys(store, 'fight_link', 'fight links')
 
-def get_already_processed_upcoming_events(output_file: str) -> Set[str]:
+def get_already_processed_upcoming_events(store) -> Set[str]:
     """
-    Check if the output file exists and extract the event names that have already been processed.
+    Extract the event names that have already been processed.
     Returns a set of event names that should be skipped.
     """
-    processed_events = set()
+    return get_already_processed_keys(store, 'event_name', 'upcoming events')
+
+def filter_new_fights(fights: List[Dict], event_name: str, event_date: Optional[str],
+                      event_url: str, processed_fights: Set[str]) -> List[Dict]:
+    """
+    Drop already processed fights and tag the remaining ones with their event details
+    """
+    print(f"  Found {len(fights)} fights in this event")
     
-    if os.path.exists(output_file):
-        try:
-            print(f"Found existing data file: {output_file}")
-            # Read the file efficiently - only load the event_name column
-            existing_data = pd.read_excel(output_file, usecols=['event_name'])
-            
-            # Extract unique event names
-            processed_events = set(existing_data['event_name'].unique())
-            print(f"Found {len(processed_events)} already processed upcoming events")
-        except Exception as e:
-            print(f"Error reading existing data file: {e}")
-    else:
-        print(f"No existing data file found at {output_file}")
+    new_fights = []
+    skipped_fights = 0
+    for fight in fights:
+        if fight['fight_link'] not in processed_fights:
+            fight['event_name'] = event_name
+            fight['event_date'] = event_date
+            fight['event_link'] = event_url
+            new_fights.append(fight)
+        else:
+            skipped_fights += 1
+            print(f"  Skipping already processed fight: {fight['fighter1']} vs {fight['fighter2']}")
     
-    return processed_events
+    print(f"  Added {len(new_fights)} new fights from this event (skipped {skipped_fights})")
+    return new_fights
 
-def scrape_ufc_fights(num_events=None, processed_events=None, processed_fights=None):
+def scrape_ufc_fights(num_events=None, processed_events=None, processed_fights=None,
+                      workers: int = 1, rate: float = 5.0, listing=None):
     """
     Scrape UFC fights from events
     
@@ -145,6 +221,9 @@ def scrape_ufc_fights(num_events=None, processed_events=None, processed_fights=N
     num_events (int, optional): Number of events to scrape. If None, scrapes all events.
     processed_events (Set[str], optional): Set of event links that have already been processed.
     processed_fights (Set[str], optional): Set of fight links that have already been processed.
+    workers (int): Number of event pages fetched in parallel (default: 1, sequential).
+    rate (float): Maximum requests per second per host when workers > 1 (default: 5).
+    listing (tuple, optional): Events listing from fetch_event_listing. If None, the full listing is downloaded.
     """
     # Initialize sets if not provided
     if processed_events is None:
@@ -154,70 +233,63 @@ def scrape_ufc_fights(num_events=None, processed_events=None, processed_fights=N
     
     print(f"Starting scrape_ufc_fights with {len(processed_events)} processed events and {len(processed_fights)} processed fights")
     
-    # First get all events
-    events_url = "http://ufcstats.com/statistics/events/completed?page=all"
-    
     try:
-        response = requests.get(events_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find all event links
-        event_rows = soup.select('tr.b-statistics__table-row')
-        
-        # Remove the first row (upcoming event)
-        event_rows = event_rows[1:]
+        # First get all events, the upcoming event is not part of them
+        if listing is None:
+            listing = fetch_event_listing()
+        events = listing[1]
         
         # Limit number of events if specified
         if num_events:
-            event_rows = event_rows[:num_events]
+            events = events[:num_events]
             print(f"Scraping the first {num_events} events...")
         else:
             print("Scraping all events...")
             
         all_fights = []
-        total_events = len(event_rows)
-        new_events_count = 0
+        total_events = len(events)
         skipped_events_count = 0
         
         print(f"Found {total_events} total events to process")
         
-        for idx, row in enumerate(event_rows, 1):
-            event_link = row.select_one('td a.b-link')
-            if event_link:
-                event_url = event_link['href']
-                event_name = event_link.text.strip()
-                event_date = row.select_one('span.b-statistics__date')
-                event_date = event_date.text.strip() if event_date else None
-                
-                # Skip if event has already been processed
-                if event_url in processed_events:
-                    print(f"Skipping already processed event: {event_name} ({idx}/{total_events})")
-                    skipped_events_count += 1
-                    continue
-                
-                new_events_count += 1
+        # Collect the events to scrape, in listing order
+        events_to_scrape = []
+        for idx, event in enumerate(events, 1):
+            event_url = event['event_url']
+            event_name = event['event_name']
+            event_date = event['event_date']
+            
+            # Skip if event has already been processed
+            if event_url in processed_events:
+                print(f"Skipping already processed event: {event_name} ({idx}/{total_events})")
+                skipped_events_count += 1
+                continue
+            
+            events_to_scrape.append((idx, event_url, event_name, event_date))
+        
+        new_events_count = len(events_to_scrape)
+        
+        if workers > 1:
+            print(f"Scraping {new_events_count} events with {workers} workers (max {rate} requests/s per host)")
+            rate_limiter = HostRateLimiter(rate)
+            
+            def fetch_event(event):
+                rate_limiter.wait(event[1])
+                return scrape_fight_links_from_event(event[1], immutable=True)
+            
+            # executor.map yields results in submission order, so rows stay in event order
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                event_fights = executor.map(fetch_event, events_to_scrape)
+                for (idx, event_url, event_name, event_date), fights in zip(events_to_scrape, event_fights):
+                    print(f"Scraped fights from: {event_name} ({idx}/{total_events})")
+                    all_fights.extend(filter_new_fights(fights, event_name, event_date, event_url, processed_fights))
+        else:
+            for idx, event_url, event_name, event_date in events_to_scrape:
                 print(f"Scraping fights from: {event_name} ({idx}/{total_events})")
                 
                 # Get all fights from this event
-                fights = scrape_fight_links_from_event(event_url)
-                print(f"  Found {len(fights)} fights in this event")
-                
-                # Filter out already processed fights
-                new_fights = []
-                skipped_fights = 0
-                for fight in fights:
-                    if fight['fight_link'] not in processed_fights:
-                        fight['event_name'] = event_name
-                        fight['event_date'] = event_date
-                        fight['event_link'] = event_url
-                        new_fights.append(fight)
-                    else:
-                        skipped_fights += 1
-                        print(f"  Skipping already processed fight: {fight['fighter1']} vs {fight['fighter2']}")
-                
-                all_fights.extend(new_fights)
-                print(f"  Added {len(new_fights)} new fights from this event (skipped {skipped_fights})")
+                fights = scrape_fight_links_from_event(event_url, immutable=True)
+                all_fights.extend(filter_new_fights(fights, event_name, event_date, event_url, processed_fights))
                 
                 # Add delay to avoid overwhelming the server
                 time.sleep(0.1)
@@ -239,39 +311,87 @@ def scrape_ufc_fights(num_events=None, processed_events=None, processed_fights=N
         traceback.print_exc()
         return pd.DataFrame()
 
-def scrape_upcoming(processed_event_names=None):
+# Columns of a scheduled fight, as listed on its event page
+CARD_COLUMNS = ['event_name', 'event_date', 'event_location', 'event_link', 
+                'fighter1', 'fighter2', 'weight_class', 'fight_link']
+
+# Columns of the event a scheduled fight belongs to
+EVENT_COLUMNS = ['event_name', 'event_date', 'event_location', 'event_link']
+
+def parse_card_fights(event_html: str, event: Dict) -> List[Dict]:
+    """
+    Extract the scheduled fights from the page of an upcoming event
+    
+    Parameters:
+    event_html (str): HTML of the event page
+    event (Dict): Event details from parse_event_row
+    """
+    event_soup = BeautifulSoup(event_html, 'html.parser')
+    
+    # Find all fight rows
+    fight_rows = event_soup.select('tr.b-fight-details__table-row[data-link]')
+    
+    print(f"Found {len(fight_rows)} fights in {event['event_name']}")
+    
+    fights = []
+    for row in fight_rows:
+        # Get fighter names
+        fighter_links = row.select('td a.b-link.b-link_style_black')
+        fighter_names = [link.text.strip() for link in fighter_links]
+        
+        # Get weight class
+        weight_class = row.select_one('td.b-fight-details__table-col p.b-fight-details__table-text')
+        weight_class = weight_class.text.strip() if weight_class else None
+        
+        # Get fight link
+        fight_link = row.get('data-link')
+        
+        fight_data = {
+            'event_name': event['event_name'],
+            'event_date': event['event_date'],
+            'event_location': event['event_location'],
+            'event_link': event['event_url'],
+            'fight_link': fight_link,
+            'fighter1': fighter_names[0] if len(fighter_names) > 0 else None,
+            'fighter2': fighter_names[1] if len(fighter_names) > 1 else None,
+            'weight_class': weight_class
+        }
+        
+        fights.append(fight_data)
+        print(f"  Added fight: {fight_data['fighter1']} vs {fight_data['fighter2']}")
+    
+    return fights
+
+def scrape_upcoming(processed_event_names=None, listing=None):
     """
     Scrape upcoming UFC events and their fights
     
     Parameters:
     processed_event_names (Set[str], optional): Set of event names that have already been processed.
+    listing (tuple, optional): Events listing from fetch_event_listing. If None, the full listing is downloaded.
     """
     if processed_event_names is None:
         processed_event_names = set()
     
     print(f"Starting scrape_upcoming with {len(processed_event_names)} processed event names")
-        
-    events_url = "http://ufcstats.com/statistics/events/completed?page=all"
     
     try:
-        response = requests.get(events_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         # Find the first row (upcoming event)
-        event_row = soup.select_one('tr.b-statistics__table-row_type_first')
+        if listing is None:
+            listing = fetch_event_listing()
+        event_row = listing[0]
         if not event_row:
             print("No upcoming events found")
             return pd.DataFrame()
             
         # Extract event details
-        event_link = event_row.select_one('a.b-link')
-        if not event_link:
+        event = parse_event_row(event_row, link_selector='a.b-link')
+        if not event:
             print("No event link found in the upcoming event row")
             return pd.DataFrame()
             
-        event_url = event_link['href']
-        event_name = event_link.text.strip()
+        event_url = event['event_url']
+        event_name = event['event_name']
         
         print(f"Found upcoming event: {event_name} at URL: {event_url}")
         
@@ -280,49 +400,18 @@ def scrape_upcoming(processed_event_names=None):
             print(f"Skipping already processed upcoming event: {event_name}")
             return pd.DataFrame()
             
-        event_date = event_row.select_one('span.b-statistics__date')
-        event_date = event_date.text.strip() if event_date else None
-        event_location = event_row.select_one('td.b-statistics__table-col_style_big-top-padding')
-        event_location = event_location.text.strip() if event_location else None
+        event_date = event['event_date']
+        event_location = event['event_location']
         
         print(f"Scraping upcoming event: {event_name} on {event_date} at {event_location}")
         
         # Get the event page to scrape individual fights
-        event_response = requests.get(event_url)
-        event_response.raise_for_status()
-        event_soup = BeautifulSoup(event_response.text, 'html.parser')
-        
-        # Find all fight rows
-        fight_rows = event_soup.select('tr.b-fight-details__table-row[data-link]')
-        
-        print(f"Found {len(fight_rows)} fights in the upcoming event")
-        
-        fights = []
-        for row in fight_rows:
-            # Get fighter names
-            fighter_links = row.select('td a.b-link.b-link_style_black')
-            fighter_names = [link.text.strip() for link in fighter_links]
-            
-            # Get weight class
-            weight_class = row.select_one('td.b-fight-details__table-col p.b-fight-details__table-text')
-            weight_class = weight_class.text.strip() if weight_class else None
-            
-            # Get fight link
-            fight_link = row.get('data-link')
-            
-            fight_data = {
-                'event_name': event_name,
-                'event_date': event_date,
-                'event_location': event_location,
-                'event_link': event_url,
-                'fight_link': fight_link,
-                'fighter1': fighter_names[0] if len(fighter_names) > 0 else None,
-                'fighter2': fighter_names[1] if len(fighter_names) > 1 else None,
-                'weight_class': weight_class
-            }
-            
-            fights.append(fight_data)
-            print(f"  Added fight: {fight_data['fighter1']} vs {fight_data['fighter2']}")
+        fights = parse_card_fights(fetch_html(event_url), {
+            'event_url': event_url,
+            'event_name': event_name,
+            'event_date': event_date,
+            'event_location': event_location,
+        })
         
         # Create DataFrame
         df = pd.DataFrame(fights)
@@ -332,9 +421,7 @@ def scrape_upcoming(processed_event_names=None):
             return pd.DataFrame()
             
         # Reorder columns
-        cols = ['event_name', 'event_date', 'event_location', 'event_link', 
-                'fighter1', 'fighter2', 'weight_class', 'fight_link']
-        df = df[cols]
+        df = df[CARD_COLUMNS]
         
         print(f"Found {len(df)} fights for {event_name}")
         
@@ -349,87 +436,95 @@ def scrape_upcoming(processed_event_names=None):
         traceback.print_exc()
         return pd.DataFrame()
 
-def scrape_fight_details(fight_df: pd.DataFrame, processed_fights=None) -> pd.DataFrame:
+def fetch_fight_pages(fight_links: List[str], workers: int = 8, rate: float = 5.0) -> List[Optional[str]]:
+    """
+    Fetch fight pages concurrently, rate limited per host
+    Returns the pages in the order of `fight_links`, None for pages that failed
+    """
+    rate_limiter = HostRateLimiter(rate)
+    
+    def fetch_page(fight_link):
+        rate_limiter.wait(fight_link)
+        try:
+            return fetch_html(fight_link)
+        except requests.RequestException as e:
+            print(f"Error fetching fight {fight_link}: {e}")
+            return None
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(fetch_page, fight_links))
+
+def scrape_fight_details(fight_df: pd.DataFrame, processed_fights=None, workers: int = 8,
+                         rate: float = 5.0, parse_workers: Optional[int] = None) -> pd.DataFrame:
     """
     Scrape detailed fight information for each fight in the DataFrame
     
+    All matchup pages of the card are fetched concurrently and parsed in a
+    process pool, then the details are joined to the card column-wise.
+    
     Parameters:
     fight_df (pd.DataFrame): DataFrame containing fight_link column
     processed_fights (Set[str], optional): Set of fight links that have already been processed.
+    workers (int): Number of pages fetched in parallel (default: 8).
+    rate (float): Maximum requests per second per host (default: 5).
+    parse_workers (int, optional): Number of processes parsing the pages (default: one per CPU, 1 parses inline).
     
     Returns:
     pd.DataFrame: Original DataFrame with additional fight detail columns
     """
     if processed_fights is None:
         processed_fights = set()
-        
-    detailed_fights = []
     
-    for _, row in fight_df.iterrows():
-        try:
-            fight_link = row['fight_link']
-            
-            # Skip if fight has already been processed
-            if fight_link in processed_fights:
-                print(f"Skipping already processed fight details: {row['fighter1']} vs {row['fighter2']}")
-                continue
-                
-            print(f"Scraping fight details: {row['fighter1']} vs {row['fighter2']}")
-            
-            response = requests.get(fight_link)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Initialize fight data with existing row data
-            fight_data = row.to_dict()
-            
-            # Get weight class from the fight details section
-            weight_class = soup.select_one('i.b-fight-details__fight-title')
-            fight_data['weight_class'] = weight_class.text.strip() if weight_class else None
-            
-            # Get fighter nicknames
-            nicknames = soup.select('p.b-fight-details__person-title')
-            fight_data['fighter1_nickname'] = nicknames[0].text.strip() if len(nicknames) > 0 else None
-            fight_data['fighter2_nickname'] = nicknames[1].text.strip() if len(nicknames) > 1 else None
-            
-            # Get fighter links
-            fighter_links = soup.select('h3.b-fight-details__person-name a')
-            fight_data['fighter1_link'] = fighter_links[0]['href'] if len(fighter_links) > 0 else None
-            fight_data['fighter2_link'] = fighter_links[1]['href'] if len(fighter_links) > 1 else None
-            
-            # Get all stat rows
-            stat_rows = soup.select('tr.b-fight-details__table-row-preview')
-            
-            for row in stat_rows:
-                # Get stat name
-                stat_name = row.select_one('td.l-page_align_left p.b-fight-details__table-text')
-                if stat_name:
-                    stat_name = stat_name.text.strip().lower().replace(' ', '_').replace('.', '')
-                    
-                    # Get values for both fighters
-                    values = row.select('td:not(.l-page_align_left) p.b-fight-details__table-text')
-                    if len(values) >= 2:
-                        # Clean and store values
-                        fighter1_value = values[0].text.strip()
-                        fighter2_value = values[1].text.strip()
-                        
-                        fight_data[f'fighter1_{stat_name}'] = fighter1_value
-                        fight_data[f'fighter2_{stat_name}'] = fighter2_value
-            
-            detailed_fights.append(fight_data)
-            time.sleep(0.1)  # Be nice to the server
-            
-        except Exception as e:
-            print(f"Error processing fight {row['fight_link']}: {e}")
-            continue
+    # Skip fights that have already been processed
+    skipped = fight_df['fight_link'].isin(processed_fights)
+    for fighter1, fighter2 in fight_df.loc[skipped, ['fighter1', 'fighter2']].itertuples(index=False):
+        print(f"Skipping already processed fight details: {fighter1} vs {fighter2}")
+    card = fight_df[~skipped].reset_index(drop=True)
+    
+    if card.empty:
+        print("No new fight details to add")
+        return pd.DataFrame()
+    
+    print(f"Scraping fight details for {len(card)} fights")
+    pages = fetch_fight_pages(card['fight_link'].tolist(), workers=workers, rate=rate)
     
-    # Create DataFrame from all fights
-    detailed_df = pd.DataFrame(detailed_fights)
+    return parse_fight_pages(card, pages, parse_workers=parse_workers)
+
+def parse_fight_pages(card: pd.DataFrame, pages: List[Optional[str]],
+                      parse_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Parse fetched matchup pages in a process pool and join the details to their fights
+    
+    Parameters:
+    card (pd.DataFrame): Fights of the card, one row per page
+    pages (List[Optional[str]]): HTML of each fight page, None for pages that failed (those fights are dropped)
+    parse_workers (int, optional): Number of processes parsing the pages (default: one per CPU, 1 parses inline).
     
-    if detailed_df.empty:
+    Fights whose page fails to parse are dropped like the ones that failed to load.
+    """
+    fetched = [i for i, page in enumerate(pages) if page is not None]
+    links = card['fight_link'].iloc[fetched].tolist()
+    html_pages = [pages[i] for i in fetched]
+    if parse_workers is None:
+        parse_workers = os.cpu_count() or 1
+    parse_workers = min(parse_workers, len(html_pages))
+    if parse_workers > 1:
+        with ProcessPoolExecutor(max_workers=parse_workers) as executor:
+            details = list(executor.map(try_parse_fight_preview, links, html_pages))
+    else:
+        details = [try_parse_fight_preview(link, page) for link, page in zip(links, html_pages)]
+    
+    parsed = [i for i, detail in zip(fetched, details) if detail is not None]
+    details = [detail for detail in details if detail is not None]
+    if not details:
         print("No new fight details to add")
         return pd.DataFrame()
     
+    # The weight class of the fight page replaces the one from the event page
+    card = card.iloc[parsed].reset_index(drop=True)
+    detailed_df = pd.concat([card.drop(columns=['weight_class'], errors='ignore'),
+                             pd.DataFrame.from_records(details)], axis=1)
+    
     # Organize columns
     base_cols = ['event_name', 'event_date', 'event_location', 'event_link', 
                  'fight_link', 'fighter1', 'fighter2', 'weight_class']
@@ -440,6 +535,109 @@ def scrape_fight_details(fight_df: pd.DataFrame, processed_fights=None) -> pd.Da
     
     return detailed_df[sorted_cols]
 
+UPCOMING_EVENTS_URL = "http://ufcstats.com/statistics/events/upcoming?page=all"
+
+def fetch_upcoming_cards() -> List[Dict]:
+    """Fetch every scheduled event from the upcoming events listing, soonest first"""
+    soup = BeautifulSoup(fetch_html(UPCOMING_EVENTS_URL), 'html.parser')
+    
+    cards = []
+    seen = set()
+    for row in soup.select('tr.b-statistics__table-row, tr.b-statistics__table-row_type_first'):
+        event = parse_event_row(row, link_selector='a.b-link')
+        if event and event['event_url'] not in seen:
+            seen.add(event['event_url'])
+            cards.append(event)
+    return cards
+
+def page_fingerprint(html: str) -> str:
+    """Content hash of a fight page, to detect changed matchups"""
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+def refresh_upcoming_cards(store, workers: int = 8, rate: float = 5.0,
+                           parse_workers: Optional[int] = None) -> Set[str]:
+    """
+    Bring the upcoming fights in `store` in line with every scheduled card
+    
+    Every fight page on the cards is fetched (conditionally, through the response
+    cache) and fingerprinted with a content hash. Only fights that are new or whose
+    page changed since the stored `content_hash` are parsed again and get a new
+    `updated_at`; unchanged fights keep their stored details, and ufc_enrich reuses
+    their features by `content_hash`. Fights that are no longer scheduled are
+    dropped. The store is only rewritten when something changed, and never on an
+    empty listing, which is more likely a failed fetch or new markup than no events.
+    
+    Parameters:
+    store (IndexedStore): Store of the upcoming fights
+    workers (int): Number of pages fetched in parallel (default: 8).
+    rate (float): Maximum requests per second per host (default: 5).
+    parse_workers (int, optional): Number of processes parsing the changed pages.
+    
+    Returns:
+    Set[str]: Fight links that were added or changed, i.e. the matchups to predict again
+    """
+    try:
+        cards = fetch_upcoming_cards()
+        print(f"Found {len(cards)} scheduled events")
+        if not cards:
+            print(f"Warning: the upcoming events listing is empty, keeping {store} as it is")
+            return set()
+        
+        fights = []
+        for event in cards:
+            fights.extend(parse_card_fights(fetch_html(event['event_url']), event))
+    except requests.RequestException as e:
+        print(f"Error fetching upcoming events: {e}")
+        return set()
+    
+    card = pd.DataFrame(fights, columns=CARD_COLUMNS).drop_duplicates(subset=['fight_link'])
+    card = card.reset_index(drop=True)
+    
+    existing = store.read() if store.exists() else pd.DataFrame(columns=['fight_link'])
+    if 'content_hash' not in existing.columns:
+        existing['content_hash'] = None
+    existing = existing.drop_duplicates(subset=['fight_link']).set_index('fight_link', drop=False)
+    
+    pages = fetch_fight_pages(card['fight_link'].tolist(), workers=workers, rate=rate)
+    hashes = pd.Series([page_fingerprint(page) if page is not None else None for page in pages])
+    stored_hashes = card['fight_link'].map(existing['content_hash'])
+    
+    # A page that failed to load counts as unchanged if we have it already
+    changed = hashes.notna() & (hashes != stored_hashes)
+    kept = ~changed & card['fight_link'].isin(existing.index)
+    removed = existing.index.difference(card['fight_link'])
+    
+    print(f"Upcoming fights: {changed.sum()} new or changed, {kept.sum()} unchanged, {len(removed)} no longer scheduled")
+    if not changed.any() and len(removed) == 0:
+        print(f"No changes to save to {store}")
+        return set()
+    
+    # Unchanged fights keep their details (the weight class of their fight page too),
+    # with the event details from the current listing
+    unchanged_df = existing.loc[card.loc[kept, 'fight_link']].reset_index(drop=True)
+    unchanged_df[EVENT_COLUMNS] = card.loc[kept, EVENT_COLUMNS].reset_index(drop=True)
+    
+    changed_df = parse_fight_pages(card[changed].reset_index(drop=True),
+                                   [pages[i] for i in changed[changed].index], parse_workers=parse_workers)
+    if not changed_df.empty:
+        changed_df['content_hash'] = changed_df['fight_link'].map(
+            dict(zip(card.loc[changed, 'fight_link'], hashes[changed])))
+        changed_df['updated_at'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    # Keep the card order of the listing
+    upcoming_df = pd.concat([unchanged_df, changed_df], ignore_index=True)
+    saved_links = set(upcoming_df['fight_link'])
+    upcoming_df = upcoming_df.set_index('fight_link', drop=False).loc[
+        [link for link in card['fight_link'] if link in saved_links]
+    ].reset_index(drop=True)
+    
+    store.overwrite(upcoming_df)
+    print(f"Saved {len(upcoming_df)} upcoming fights to {store}")
+    for link in removed:
+        print(f"  Removed fight no longer scheduled: {link}")
+    
+    return set(changed_df['fight_link']) if not changed_df.empty else set()
+
 def debug_dataframe(df, label="DataFrame"):
     """
     Print debug information about a DataFrame
@@ -458,78 +656,61 @@ def debug_dataframe(df, label="DataFrame"):
     if 'event_name' in df.columns:
         print(f"  - Event names: {df['event_name'].unique().tolist()[:3]} (showing first 3)")
 
-def save_data(df: pd.DataFrame, output_file: str, overwrite: bool = False) -> None:
+def save_data(df: pd.DataFrame, store, overwrite: bool = False, excel_export: Optional[str] = None) -> None:
     """
-    Save DataFrame to Excel file, either merging with existing data or overwriting
+    Save DataFrame to the data store, either appending the new rows or overwriting
     
     Parameters:
     df (pd.DataFrame): DataFrame to save
-    output_file (str): Path to output file
-    overwrite (bool): Whether to overwrite existing file instead of merging (default: False)
+    store (IndexedStore): Store to write to, its key index is updated with the new rows
+    overwrite (bool): Whether to overwrite the existing data instead of appending (default: False)
+    excel_export (str, optional): Also export the full data to this Excel file
     """
     if df.empty:
-        print(f"No new data to save to {output_file}")
+        print(f"No new data to save to {store}")
         return
     
     # Debug the new data
     debug_dataframe(df, "New data to save")
-        
-    if os.path.exists(output_file) and not overwrite:
-        try:
-            # Load existing data
-            existing_data = pd.read_excel(output_file)
-            
-            # Debug the existing data
-            debug_dataframe(existing_data, "Existing data")
-            
-            # Check for duplicates before merging
-            if 'fight_link' in df.columns and 'fight_link' in existing_data.columns:
-                new_links = set(df['fight_link'].unique())
-                existing_links = set(existing_data['fight_link'].unique())
-                overlap = new_links.intersection(existing_links)
+    
+    try:
+        if store.exists() and not overwrite:
+            # Drop rows that are already stored, looked up in the key index
+            if 'fight_link' in df.columns:
+                existing_links = store.keys('fight_link')
+                overlap = existing_links.intersection(df['fight_link'].unique())
                 if overlap:
-                    print(f"Warning: Found {len(overlap)} overlapping fight links that may cause duplicates")
+                    print(f"Warning: Found {len(overlap)} overlapping fight links, skipping them")
                     print(f"First few overlapping links: {list(overlap)[:3]}")
+                    df = df[~df['fight_link'].isin(overlap)]
             
-            # Concatenate with new data
-            combined_data = pd.concat([existing_data, df], ignore_index=True)
-            
-            # Remove duplicates if they exist
-            if 'fight_link' in combined_data.columns:
-                before_count = len(combined_data)
-                combined_data = combined_data.drop_duplicates(subset=['fight_link'])
-                after_count = len(combined_data)
-                if before_count > after_count:
-                    print(f"Removed {before_count - after_count} duplicate rows")
-            
-            print(f"Combined {len(existing_data)} existing rows with {len(df)} new rows")
+            # Remove duplicates within the new data
+            if 'fight_link' in df.columns:
+                before_count = len(df)
+                df = df.drop_duplicates(subset=['fight_link'])
+                if before_count > len(df):
+                    print(f"Removed {before_count - len(df)} duplicate rows")
             
-            # Save the combined data
-            combined_data.to_excel(output_file, index=False)
-            print(f"Data saved to {output_file}")
+            store.append(df)
+            print(f"Appended {len(df)} new rows to {store}")
+        else:
+            # Save the new data (either no existing data or overwrite=True)
+            if overwrite and store.exists():
+                print(f"Overwriting existing data: {store}")
             
-            # Display summary
-            if 'fight_link' in combined_data.columns:
-                print(f"Total: {len(combined_data)} rows from {len(combined_data['fight_link'].unique())} fights")
-            elif 'event_name' in combined_data.columns:
-                print(f"Total: {len(combined_data)} rows from {len(combined_data['event_name'].unique())} events")
-        except Exception as e:
-            print(f"Error saving data: {e}")
-            import traceback
-            traceback.print_exc()
-    else:
-        # Save the new data (either no existing file or overwrite=True)
-        if overwrite and os.path.exists(output_file):
-            print(f"Overwriting existing file: {output_file}")
-        
-        df.to_excel(output_file, index=False)
-        print(f"Data saved to {output_file}")
+            store.overwrite(df)
+            print(f"Data saved to {store}")
         
         # Display summary
         if 'fight_link' in df.columns:
-            print(f"Total: {len(df)} rows from {len(df['fight_link'].unique())} fights")
-        elif 'event_name' in df.columns:
-            print(f"Total: {len(df)} rows from {len(df['event_name'].unique())} events")
+            print(f"Total: {len(store.keys('fight_link'))} fights in {store}")
+        
+        if excel_export:
+            export_excel(store, excel_export)
+    except Exception as e:
+        print(f"Error saving data: {e}")
+        import traceback
+        traceback.print_exc()
 
 def main():
     # Set up argument parser
@@ -537,7 +718,23 @@ def main():
     parser.add_argument('--events', type=int, help='Number of events to scrape (default: all events)')
     parser.add_argument('--previous', action='store_true', help='Scrape previous events')
     parser.add_argument('--upcoming', action='store_true', help='Scrape upcoming events')
+    parser.add_argument('--incremental', action='store_true', help='Only fetch the listing pages down to the newest already processed event')
+    parser.add_argument('--workers', type=int, default=1, help='Number of event pages to fetch in parallel (default: 1)')
+    parser.add_argument('--all-cards', action='store_true', help='Track every scheduled event and only re-scrape fights whose page changed')
+    parser.add_argument('--card-workers', type=int, default=8, help='Number of upcoming fight pages to fetch in parallel (default: 8)')
+    parser.add_argument('--rate', type=float, default=5.0, help='Max requests per second per host in parallel mode (default: 5)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'HTTP response cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-size-mb', type=int, default=2048, help='Maximum size of the response cache in MB (default: 2048)')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the HTTP response cache')
+    parser.add_argument('--offline', action='store_true', help='Serve every page from the response cache, no network access')
+    parser.add_argument('--storage', choices=['parquet', 'excel'], default='parquet', help='Storage format of the scraped data (default: parquet)')
+    parser.add_argument('--export-excel', action='store_true', help='Also export the data to the .xlsx files after saving')
     args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error('--rate must be positive')
+    
+    if not args.no_cache:
+        configure_cache(ResponseCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 ** 2), offline=args.offline)
     
     # Define output file paths - ensure UFC directory exists
     output_dir = 'data'
@@ -545,22 +742,53 @@ def main():
         os.makedirs(output_dir)
         print(f"Created directory: {output_dir}")
     
-    previous_events_file = os.path.join(output_dir, 'ufc_events.xlsx')
-    upcoming_events_file = os.path.join(output_dir, 'ufc_upcoming_events.xlsx')
+    previous_events_excel = os.path.join(output_dir, 'ufc_events.xlsx')
+    upcoming_events_excel = os.path.join(output_dir, 'ufc_upcoming_events.xlsx')
     
-    print(f"Previous events will be saved to: {previous_events_file}")
-    print(f"Upcoming events will be saved to: {upcoming_events_file}")
+    if args.storage == 'parquet':
+        # Parquet datasets are the system of record, the Excel files are imported once
+        previous_events_path = os.path.join(output_dir, 'ufc_events.parquet')
+        upcoming_events_path = os.path.join(output_dir, 'ufc_upcoming_events.parquet')
+    else:
+        previous_events_path = previous_events_excel
+        upcoming_events_path = upcoming_events_excel
+    previous_events_store = open_store(previous_events_path, seed_from=previous_events_excel,
+                                       key_columns=['event_link', 'fight_link'])
+    upcoming_events_store = open_store(upcoming_events_path, seed_from=upcoming_events_excel,
+                                       key_columns=['event_name', 'fight_link'])
+    
+    # Only export to Excel when asked to and when Excel isn't already the storage format
+    export = args.export_excel and args.storage == 'parquet'
+    
+    print(f"Previous events will be saved to: {previous_events_store}")
+    print(f"Upcoming events will be saved to: {upcoming_events_store}")
     
     # If no specific action is requested, do both
     if not args.previous and not args.upcoming:
         args.previous = True
         args.upcoming = True
     
+    # In incremental mode the listing is fetched once, page by page down to the newest
+    # event we already have, and shared by previous and upcoming events
+    listing = None
+    if args.incremental:
+        known_events = get_already_processed_events(previous_events_store) if args.previous else set()
+        try:
+            # Without stored events there is nothing to stop at, the full listing is one request.
+            # For the upcoming event alone the first page is enough.
+            listing = fetch_event_listing(known_events=known_events or None, num_events=args.events,
+                                          max_pages=None if args.previous else 1)
+        except requests.RequestException as e:
+            print(f"Error fetching events: {e}")
+            return
+        if args.previous:
+            print(f"Found {len(listing[1])} new events in the listing")
+    
     # Process previous events
     if args.previous:
         # Get already processed events and fights
-        processed_events = get_already_processed_events(previous_events_file)
-        processed_fights = get_already_processed_fights(previous_events_file)
+        processed_events = get_already_processed_events(previous_events_store)
+        processed_fights = get_already_processed_fights(previous_events_store)
         
         print(f"Starting to scrape previous events (skipping {len(processed_events)} already processed events)")
         
@@ -568,34 +796,44 @@ def main():
         df = scrape_ufc_fights(
             num_events=args.events,
             processed_events=processed_events,
-            processed_fights=processed_fights
+            processed_fights=processed_fights,
+            workers=args.workers,
+            rate=args.rate,
+            listing=listing
         )
         
         if not df.empty:
-            print(f"Found {len(df)} new fights to add to {previous_events_file}")
+            print(f"Found {len(df)} new fights to add to {previous_events_store}")
             # Save data
-            save_data(df, previous_events_file)
+            save_data(df, previous_events_store, excel_export=previous_events_excel if export else None)
         else:
-            print(f"No new fights found to add to {previous_events_file}")
+            print(f"No new fights found to add to {previous_events_store}")
     
     # Process upcoming events
-    if args.upcoming:
+    if args.upcoming and args.all_cards:
+        changed_fights = refresh_upcoming_cards(upcoming_events_store, workers=args.card_workers, rate=args.rate)
+        print(f"{len(changed_fights)} upcoming fights to predict again")
+        if changed_fights and export:
+            export_excel(upcoming_events_store, upcoming_events_excel)
+    elif args.upcoming:
         # Get already processed upcoming events
-        processed_event_names = get_already_processed_upcoming_events(upcoming_events_file)
-        processed_fights = get_already_processed_fights(upcoming_events_file)
+        processed_event_names = get_already_processed_upcoming_events(upcoming_events_store)
+        processed_fights = get_already_processed_fights(upcoming_events_store)
         
         print(f"Starting to scrape upcoming events (skipping {len(processed_event_names)} already processed events)")
         
         # Scrape upcoming events
-        df = scrape_upcoming(processed_event_names=processed_event_names)
+        df = scrape_upcoming(processed_event_names=processed_event_names, listing=listing)
         
         if not df.empty:
             print(f"Found {len(df)} new upcoming fights to process")
             # Scrape detailed fight information
-            df_detailed = scrape_fight_details(df, processed_fights=processed_fights)
+            df_detailed = scrape_fight_details(df, processed_fights=processed_fights,
+                                               workers=args.card_workers, rate=args.rate)
             
-            # Save data with overwrite=True to replace the existing file
-            save_data(df_detailed, upcoming_events_file, overwrite=True)
+            # Save data with overwrite=True to replace the existing data
+            save_data(df_detailed, upcoming_events_store, overwrite=True,
+                      excel_export=upcoming_events_excel if export else None)
         else:
             print("No new upcoming events found")
 
@@ -1,30 +1,30 @@
 from bs4 import BeautifulSoup
-import requests
 import pandas as pd
+import numpy as np
 import time
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import re
-from bs4 import BeautifulSoup
 import os
-
-# Setup Selenium
-chrome_options = Options()
-chrome_options.add_argument("--headless")  # Run in headless mode (no GUI)
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-# Add these new options to suppress warnings
-chrome_options.add_argument("--disable-gpu")
-chrome_options.add_argument("--log-level=3")  # Only show fatal errors
-chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-
-# Initialize the driver (make sure you have chromedriver installed)
-driver = webdriver.Chrome(options=chrome_options)
+import argparse
+import hashlib
+from ufc_http import configure_cache, fetch_html
+from ufc_cache import DEFAULT_CACHE_DIR, ResponseCache
+from ufc_browser import get_browser_pool, shutdown_browser_pool
+from ufc_fighters import DEFAULT_STORE_PATH, DEFAULT_TTL_DAYS, FighterStore
+from ufc_parse import has_significant_strikes, make_soup, parse_round_tables
+from ufc_storage import Checkpoint, export_excel, open_store
 
 def scrape_significant_strikes_per_round(html_content):
-    soup = BeautifulSoup(html_content, "html.parser")
+    """
+    Extract the per-round significant strikes table. The per-round tables are
+    part of the static markup (the page's JavaScript only toggles their
+    visibility), so an already parsed BeautifulSoup object can be passed in
+    instead of the raw HTML to avoid parsing the page twice.
+    """
+    if isinstance(html_content, BeautifulSoup):
+        soup = html_content
+    else:
+        soup = BeautifulSoup(html_content, "html.parser")
 
     # Step A: Find <th> elements that say "Round 1," "Round 2," etc.
     round_ths = soup.find_all("th", string=re.compile(r"Round\s+\d+"))
@@ -295,9 +295,7 @@ def extract_round_stats(soup: BeautifulSoup, round_num: int) -> Dict:
 def extract_fighter_details(fighter_url: str) -> Dict:
     """Extract fighter physical details and stats from their profile page"""
     try:
-        response = requests.get(fighter_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = make_soup(fetch_html(fighter_url))
         
         fighter_details = {}
         
@@ -329,15 +327,21 @@ def extract_fighter_details(fighter_url: str) -> Dict:
         print(f"Error fetching fighter details from {fighter_url}: {e}")
         return {}
 
-def scrape_fight_data(fight_url: str) -> Optional[Dict]:
-    """Scrape all data for a single fight"""
+def scrape_fight_data(fight_url: str, render: bool = False, fighter_store: Optional[FighterStore] = None) -> Optional[Dict]:
+    """
+    Scrape all data for a single fight from a single fetch of its page
+    
+    Parameters:
+    fight_url (str): URL of the fight details page
+    render (bool): Fall back to rendering the page in the browser when the static
+                   markup has no per-round significant strikes (default: False)
+    fighter_store (FighterStore, optional): Profile store, so each fighter's page is fetched once
+                                            instead of once per fight
+    """
     try:
-        response = requests.get(fight_url)
-        response.raise_for_status()
-        
-        # Get the HTML content and create soup object
-        html_content = response.text
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Get the HTML content and create soup object (completed fights never change)
+        html_content = fetch_html(fight_url, immutable=True)
+        soup = make_soup(html_content)
         
         # Get basic fight details first
         fight_data = extract_fight_details(soup)
@@ -348,80 +352,32 @@ def scrape_fight_data(fight_url: str) -> Optional[Dict]:
         # Store fighter details separately to prevent overwriting
         fighter_details = {}
         
-        # Get fighter details for both fighters
-        if 'red_fighter_link' in fight_data:
-            red_details = extract_fighter_details(fight_data['red_fighter_link'])
-            fighter_details['red_fighter_reach'] = red_details.get('reach')
-            fighter_details['red_fighter_height'] = red_details.get('height')
-            fighter_details['red_fighter_weight'] = red_details.get('weight')
-            fighter_details['red_fighter_stance'] = red_details.get('stance')
-            fighter_details['red_fighter_dob'] = red_details.get('dob')
-            
-        if 'blue_fighter_link' in fight_data:
-            blue_details = extract_fighter_details(fight_data['blue_fighter_link'])
-            fighter_details['blue_fighter_reach'] = blue_details.get('reach')
-            fighter_details['blue_fighter_height'] = blue_details.get('height')
-            fighter_details['blue_fighter_weight'] = blue_details.get('weight')
-            fighter_details['blue_fighter_stance'] = blue_details.get('stance')
-            fighter_details['blue_fighter_dob'] = blue_details.get('dob')
+        # Get fighter details for both fighters, from the profile store when one is given
+        fighter_links = {prefix: fight_data[f'{prefix}_fighter_link']
+                         for prefix in ['red', 'blue'] if f'{prefix}_fighter_link' in fight_data}
+        if fighter_store is not None:
+            profiles = fighter_store.get_many(fighter_links.values(), extract_fighter_details)
+        else:
+            profiles = {link: extract_fighter_details(link) for link in fighter_links.values()}
         
-        # Get round-by-round stats
-        for round_num in range(1, 6):
-            round_stats = extract_round_stats(soup, round_num)
-            if round_stats:
-                fight_data.update(round_stats)
+        for prefix, link in fighter_links.items():
+            details = profiles.get(link, {})
+            fighter_details[f'{prefix}_fighter_reach'] = details.get('reach')
+            fighter_details[f'{prefix}_fighter_height'] = details.get('height')
+            fighter_details[f'{prefix}_fighter_weight'] = details.get('weight')
+            fighter_details[f'{prefix}_fighter_stance'] = details.get('stance')
+            fighter_details[f'{prefix}_fighter_dob'] = details.get('dob')
         
-        # Add fighter details after round stats to ensure they're not overwritten
-        fight_data.update(fighter_details)
-    
-        response = requests.get(fight_url)
-        response.raise_for_status()
+        # Get all round-by-round stats (Totals and Significant Strikes) in one pass
+        fight_data.update(parse_round_tables(soup))
         
-        # Get the HTML content and create soup object
-        html_content = response.content.decode('utf-8')
-    
-
-        driver.get(fight_url)
-        time.sleep(0.5)
-        html_content = driver.page_source
-
-        sig_strikes_data = scrape_significant_strikes_per_round(html_content)
+        # Explicit opt-in: re-render the page in the browser if the static markup had no per-round tables
+        if render and not has_significant_strikes(fight_data):
+            print(f"No static per-round significant strikes found, rendering {fight_url} in the browser")
+            fight_data.update(parse_round_tables(make_soup(get_browser_pool().render(fight_url))))
         
-        # Convert the sig strikes data into the format matching our DataFrame
-        for round_data in sig_strikes_data:
-            round_num = round_data['round']
-            fighter_name = round_data['fighter'].strip()
-            red_fighter_name = fight_data.get('red_fighter_name', '').strip()
-            
-            # Determine prefix based on exact fighter name match
-            prefix = 'red' if fighter_name == red_fighter_name else 'blue'
-            
-            # Helper function to safely split "X of Y" values
-            def split_strike_value(value):
-                try:
-                    return value.split(' of ')
-                except:
-                    return ['0', '0']
-            
-            # Add the significant strikes data with proper column names
-            fight_data.update({
-                f'{prefix}_r{round_num}_sig_str_landed': split_strike_value(round_data['sig_str'])[0],
-                f'{prefix}_r{round_num}_sig_str_attempted': split_strike_value(round_data['sig_str'])[1],
-                f'{prefix}_r{round_num}_sig_str_pct': round_data['sig_str_pct'].replace('%', ''),
-                f'{prefix}_r{round_num}_head_landed': split_strike_value(round_data['head'])[0],
-                f'{prefix}_r{round_num}_head_attempted': split_strike_value(round_data['head'])[1],
-                f'{prefix}_r{round_num}_body_landed': split_strike_value(round_data['body'])[0],
-                f'{prefix}_r{round_num}_body_attempted': split_strike_value(round_data['body'])[1],
-                f'{prefix}_r{round_num}_leg_landed': split_strike_value(round_data['leg'])[0],
-                f'{prefix}_r{round_num}_leg_attempted': split_strike_value(round_data['leg'])[1],
-                f'{prefix}_r{round_num}_distance_landed': split_strike_value(round_data['distance'])[0],
-                f'{prefix}_r{round_num}_distance_attempted': split_strike_value(round_data['distance'])[1],
-                f'{prefix}_r{round_num}_clinch_landed': split_strike_value(round_data['clinch'])[0],
-                f'{prefix}_r{round_num}_clinch_attempted': split_strike_value(round_data['clinch'])[1],
-                f'{prefix}_r{round_num}_ground_landed': split_strike_value(round_data['ground'])[0],
-                f'{prefix}_r{round_num}_ground_attempted': split_strike_value(round_data['ground'])[1],
-            })
-
+        # Add fighter details after round stats to ensure they're not overwritten
+        fight_data.update(fighter_details)
         
         return fight_data
     
@@ -429,30 +385,130 @@ def scrape_fight_data(fight_url: str) -> Optional[Dict]:
         print(f"Error fetching fight data from {fight_url}: {e}")
         return None
 
-def get_already_processed_fights(output_file: str) -> Set[str]:
+def get_already_processed_fights(store) -> Set[str]:
     """
-    Check if the output file exists and extract the fight URLs that have already been processed.
+    Check if the data store exists and extract the fight URLs that have already been processed.
     Returns a set of fight URLs that should be skipped.
     """
     processed_fights = set()
     
-    if os.path.exists(output_file):
+    if store.exists():
         try:
-            print(f"Found existing data file: {output_file}")
-            # Read the file efficiently - only load the fight_url column
-            existing_data = pd.read_excel(output_file, usecols=['fight_url'])
-            
-            # Extract unique fight URLs
-            processed_fights = set(existing_data['fight_url'].unique())
+            print(f"Found existing data: {store}")
+            # Served from the store's key index, the data itself isn't read
+            processed_fights = store.keys('fight_url')
             print(f"Found {len(processed_fights)} already processed fights")
         except Exception as e:
-            print(f"Error reading existing data file: {e}")
+            print(f"Error reading existing data: {e}")
     else:
-        print(f"No existing data file found at {output_file}")
+        print(f"No existing data found at {store}")
     
     return processed_fights
 
-def process_fights(fight_urls: List[str], processed_fights: Set[str] = None, max_fights: Optional[int] = None) -> pd.DataFrame:
+# Fighter profile columns, copied into every round row
+FIGHTER_COLS = ['red_fighter_reach', 'red_fighter_height', 'red_fighter_weight', 
+                'red_fighter_stance', 'red_fighter_dob', 'blue_fighter_reach', 
+                'blue_fighter_height', 'blue_fighter_weight', 'blue_fighter_stance', 
+                'blue_fighter_dob']
+
+# Per-round stat keys, e.g. 'red_r2_sig_str_landed' -> ('red', '2', 'sig_str_landed')
+ROUND_KEY_PATTERN = r'^(.*?)_r(\d+)_(.*)$'
+
+# Normalized layout (--layout normalized): one row per fight, and the per-round stats keyed by fight_url
+DEFAULT_FIGHTS_PATH = os.path.join('data', 'ufc_fights.parquet')
+DEFAULT_ROUNDS_PATH = os.path.join('data', 'ufc_rounds.parquet')
+
+def _stack_rounds(fights: List[Dict]) -> Optional[Tuple[pd.DataFrame, List[str], np.ndarray, pd.DataFrame]]:
+    """
+    Split a batch of scraped fights into their wide frame, the fight-level
+    columns, and the per-round stats stacked into one row per round (with the
+    position of each round's fight in the wide frame). None without round stats.
+    
+    The '{corner}_r{N}_{stat}' columns are split into a (round, '{corner}_{stat}')
+    MultiIndex and stacked in one go, from round 1 up to the last round with any
+    stats of every fight.
+    """
+    wide = pd.DataFrame(fights)
+    if wide.empty:
+        return None
+    
+    parts = wide.columns.to_series().str.extract(ROUND_KEY_PATTERN)
+    is_round = parts[1].notna().to_numpy()
+    
+    # Base fight details (non-round specific data), fighter details always included
+    base_cols = [col for col in wide.columns if '_r' not in col or col in FIGHTER_COLS]
+    
+    if not is_round.any():
+        return None
+    
+    round_wide = wide.loc[:, is_round]
+    round_numbers = parts.loc[is_round, 1].astype(int).to_numpy()
+    round_wide.columns = pd.MultiIndex.from_arrays(
+        [round_numbers, (parts.loc[is_round, 0] + '_' + parts.loc[is_round, 2]).to_numpy()],
+        names=['round', 'stat']
+    )
+    
+    # Last round with any stats per fight; fights without round stats get no rows
+    last_round = np.where(round_wide.notna().to_numpy(), round_numbers, 0).max(axis=1)
+    
+    rounds = round_wide.stack(level='round')
+    rounds = rounds.reindex(pd.MultiIndex.from_product([wide.index, range(1, last_round.max() + 1)],
+                                                       names=[None, 'round']))
+    keep = rounds.index.get_level_values('round').to_numpy() <= np.repeat(last_round, last_round.max())
+    rounds = rounds[keep]
+    
+    fight_positions = rounds.index.get_level_values(0).to_numpy()
+    rounds = pd.concat([
+        pd.DataFrame({'round': rounds.index.get_level_values('round')}),
+        rounds.reset_index(drop=True),
+    ], axis=1)
+    rounds.columns.name = None
+    return wide, base_cols, fight_positions, rounds
+
+def build_fights_frame(fights: List[Dict]) -> pd.DataFrame:
+    """
+    Reshape a batch of scraped fights (one wide dict per fight) into a DataFrame
+    with one row per round, and match, fighter, round and stat columns in order.
+    The fight-level columns are repeated for every round (see build_fight_tables
+    for the normalized layout).
+    """
+    stacked = _stack_rounds(fights)
+    if stacked is None:
+        return pd.DataFrame()
+    wide, base_cols, fight_positions, rounds = stacked
+    
+    df = pd.concat([wide[base_cols].iloc[fight_positions].reset_index(drop=True), rounds], axis=1)
+    
+    # Get actual columns from the DataFrame
+    match_cols = [col for col in ['event_name', 'fight_type', 'method', 'time_format', 
+                                 'referee', 'finish_details'] if col in df.columns]
+    fighter_cols = [col for col in FIGHTER_COLS if col in df.columns]
+    round_col = ['round']
+    stat_cols = [col for col in df.columns if col not in match_cols + fighter_cols + round_col]
+    
+    # Reorder columns only if they exist
+    return df[match_cols + fighter_cols + round_col + sorted(stat_cols)]
+
+def build_fight_tables(fights: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Normalized layout of a batch of scraped fights: a fights table with one
+    row per fight and the fight-level columns (event, method, referee, fighter
+    details, ...), and a rounds table with one row per round and only the
+    'fight_url' key, 'round' and the per-round stats. Fights without round
+    stats are left out of both, like in build_fights_frame.
+    """
+    stacked = _stack_rounds(fights)
+    if stacked is None:
+        return pd.DataFrame(), pd.DataFrame()
+    wide, base_cols, fight_positions, rounds = stacked
+    
+    fights_df = wide[base_cols].iloc[np.unique(fight_positions)].reset_index(drop=True)
+    rounds.insert(0, 'fight_url', wide['fight_url'].to_numpy()[fight_positions])
+    stat_cols = [col for col in rounds.columns if col not in ('fight_url', 'round')]
+    return fights_df, rounds[['fight_url', 'round'] + sorted(stat_cols)]
+
+def process_fights(fight_urls: List[str], processed_fights: Set[str] = None, max_fights: Optional[int] = None,
+                   render: bool = False, fighter_store: Optional[FighterStore] = None) -> pd.DataFrame:
     """Process multiple fights and return as DataFrame with rounds as separate rows"""
     all_fights_data = []
     
@@ -472,118 +528,223 @@ def process_fights(fight_urls: List[str], processed_fights: Set[str] = None, max
     
     for i, url in enumerate(new_fight_urls, 1):
         print(f"\rProcessing fight {i}/{total_fights} ({url})... ")
-        fight_data = scrape_fight_data(url)
+        fight_data = scrape_fight_data(url, render=render, fighter_store=fighter_store)
         
         if fight_data:
-            # Get the maximum round number from the data
-            round_numbers = []
-            for key in fight_data.keys():
-                match = re.search(r'_r(\d+)_', key)
-                if match:
-                    round_numbers.append(int(match.group(1)))
-            
-            max_round = max(round_numbers) if round_numbers else 0
-            
-            # Base fight details (non-round specific data)
-            base_fight_data = {k: v for k, v in fight_data.items() if '_r' not in k}
-            
-            # Ensure fighter details are included in base data
-            fighter_cols = ['red_fighter_reach', 'red_fighter_height', 'red_fighter_weight', 
-                          'red_fighter_stance', 'red_fighter_dob', 'blue_fighter_reach', 
-                          'blue_fighter_height', 'blue_fighter_weight', 'blue_fighter_stance', 
-                          'blue_fighter_dob']
-            for col in fighter_cols:
-                if col in fight_data:
-                    base_fight_data[col] = fight_data[col]
-            
-            # Create a row for each round
-            for round_num in range(1, max_round + 1):
-                round_data = base_fight_data.copy()
-                round_data['round'] = round_num
-                
-                # Extract all stats for this specific round
-                for key, value in fight_data.items():
-                    if f'_r{round_num}_' in key:
-                        new_key = key.replace(f'_r{round_num}_', '_')
-                        round_data[new_key] = value
-                
-                all_fights_data.append(round_data)
+            all_fights_data.append(fight_data)
         
         time.sleep(0.5)  # Be nice to the server
     
+    if fighter_store is not None:
+        print(f"Fighter profiles: {fighter_store.hits} served from the store, {fighter_store.misses} fetched")
+    
     if not all_fights_data:
         print("No new fights to process.")
         return pd.DataFrame()
     
     print("Creating DataFrame...")
-    df = pd.DataFrame(all_fights_data)
+    return build_fights_frame(all_fights_data)
+
+def stream_fights(fight_urls: List[str], output_store, checkpoint: Checkpoint,
+                  processed_fights: Set[str] = None, max_fights: Optional[int] = None, render: bool = False,
+                  fighter_store: Optional[FighterStore] = None, flush_every: int = 25,
+                  rounds_store=None) -> int:
+    """
+    Process multiple fights like process_fights, but append the rows to `output_store`
+    every `flush_every` fights instead of keeping them all in memory.
     
-    # Get actual columns from the DataFrame
-    match_cols = [col for col in ['event_name', 'fight_type', 'method', 'time_format', 
-                                 'referee', 'finish_details'] if col in df.columns]
-    fighter_cols = [col for col in fighter_cols if col in df.columns]
-    round_col = ['round']
-    stat_cols = [col for col in df.columns if col not in match_cols + fighter_cols + round_col]
+    With a `rounds_store` the fights are written normalized (see build_fight_tables):
+    one row per fight to `output_store` and the per-round stats to `rounds_store`.
+    The rounds are written first, so a fight listed in `output_store` always has
+    its rounds stored.
     
-    # Reorder columns only if they exist
-    df = df[match_cols + fighter_cols + round_col + sorted(stat_cols)]
+    After every flush the position in `fight_urls` is saved to `checkpoint`, so an
+    interrupted run (crash, ban, Ctrl-C) continues right after the last flushed fight.
+    Fights that failed to load or parse are saved with it and retried first on resume.
+    Rows still buffered when the run is interrupted are flushed on the way out.
     
-    return df
+    Returns the number of round rows written.
+    """
+    if processed_fights is None:
+        processed_fights = set()
+    
+    # The cursor is only valid for the same list of fights
+    source = hashlib.sha256('\n'.join(fight_urls).encode()).hexdigest()
+    state = checkpoint.load()
+    start = 0
+    failed = set()
+    if state.get('source') == source:
+        start = state.get('next_index', 0)
+        failed = set(state.get('failed_fight_urls', []))
+        print(f"Resuming from checkpoint at fight {start}/{len(fight_urls)} ({state.get('last_fight_url')}), "
+              f"retrying {len(failed)} failed fights first")
+    
+    # Filter out already processed fights, keeping their position in the source list (failed fights come first)
+    new_fights = [(idx, url) for idx, url in enumerate(fight_urls)
+                  if (idx >= start or url in failed) and url not in processed_fights]
+    
+    # Limit number of fights if specified
+    if max_fights:
+        new_fights = new_fights[:max_fights]
+    
+    total_fights = len(new_fights)
+    print(f"Found {total_fights} new fights to process out of {len(fight_urls)} total fights")
+    
+    buffer = []
+    pending = 0
+    rows_written = 0
+    next_index = start
+    last_url = state.get('last_fight_url')
+    
+    def flush():
+        nonlocal buffer, pending, rows_written
+        if rounds_store is not None:
+            fights, rows = build_fight_tables(buffer) if buffer else (pd.DataFrame(), pd.DataFrame())
+            if not rows.empty:
+                rounds_store.append(rows)
+                output_store.append(fights)
+                rows_written += len(rows)
+        else:
+            rows = build_fights_frame(buffer) if buffer else pd.DataFrame()
+            if not rows.empty:
+                output_store.append(rows)
+                rows_written += len(rows)
+        checkpoint.save({
+            'source': source,
+            'next_index': next_index,
+            'last_fight_url': last_url,
+            'failed_fight_urls': sorted(failed),
+            'rows_written': rows_written,
+            'updated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        if pending:
+            print(f"Flushed {len(rows)} rows from {pending} fights to {output_store}")
+        buffer = []
+        pending = 0
+    
+    completed = False
+    try:
+        for i, (idx, url) in enumerate(new_fights, 1):
+            print(f"\rProcessing fight {i}/{total_fights} ({url})... ")
+            fight_data = scrape_fight_data(url, render=render, fighter_store=fighter_store)
+            
+            if fight_data:
+                buffer.append(fight_data)
+                failed.discard(url)
+            else:
+                failed.add(url)
+            pending += 1
+            if idx >= next_index:
+                next_index = idx + 1
+                last_url = url
+            
+            if pending >= flush_every:
+                flush()
+            
+            time.sleep(0.5)  # Be nice to the server
+        completed = True
+    finally:
+        flush()
+    
+    # A full pass needs no cursor, the next run only picks up new fights
+    if completed and not max_fights:
+        checkpoint.clear()
+    
+    if fighter_store is not None:
+        print(f"Fighter profiles: {fighter_store.hits} served from the store, {fighter_store.misses} fetched")
+    print(f"Wrote {rows_written} round rows to {output_store}")
+    
+    return rows_written
 
 def main():
     # from UFC_events import main as events_main
     # events = events_main()
     # fight_urls = events['fight_link'].tolist()
 
-    # Define output file path
-    output_file = 'data/ufc_fight_details.xlsx'
+    parser = argparse.ArgumentParser(description='Scrape UFC fight details')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'HTTP response cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-size-mb', type=int, default=2048, help='Maximum size of the response cache in MB (default: 2048)')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the HTTP response cache')
+    parser.add_argument('--offline', action='store_true', help='Serve every page from the response cache, no network access')
+    parser.add_argument('--render', action='store_true', help='Render fight pages in headless Chrome when the static markup lacks per-round tables')
+    parser.add_argument('--browsers', type=int, default=1, help='Number of pooled Chrome drivers for --render (default: 1)')
+    parser.add_argument('--browser-recycle', type=int, default=50, help='Restart a Chrome driver after this many pages (default: 50)')
+    parser.add_argument('--fighter-store', default=DEFAULT_STORE_PATH, help=f'Fighter profile store (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--fighter-ttl-days', type=float, default=DEFAULT_TTL_DAYS, help=f'Re-fetch stored fighter profiles older than this (default: {DEFAULT_TTL_DAYS})')
+    parser.add_argument('--refresh-fighters', action='store_true', help='Re-fetch every fighter profile once during this run')
+    parser.add_argument('--storage', choices=['parquet', 'excel'], default='parquet', help='Storage format of the scraped data (default: parquet)')
+    parser.add_argument('--export-excel', action='store_true', help='Also export the fight details to data/ufc_fight_details.xlsx')
+    parser.add_argument('--layout', choices=['rounds', 'normalized'], default='rounds',
+                        help='One row per round with the fight details repeated, or separate fights and rounds tables (default: rounds)')
+    parser.add_argument('--flush-every', type=int, default=25, help='Save progress every N fights (default: 25)')
+    parser.add_argument('--restart', action='store_true', help='Ignore the resume checkpoint of an interrupted run')
+    args = parser.parse_args()
+    
+    if args.render:
+        # Configures the pool only, Chrome starts when the first page needs rendering
+        get_browser_pool(size=args.browsers, max_pages=args.browser_recycle)
+    
+    if not args.no_cache:
+        configure_cache(ResponseCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 ** 2), offline=args.offline)
+
+    # Define output paths, the Excel files are imported once and are optional exports afterwards
+    output_excel = 'data/ufc_fight_details.xlsx'
+    events_excel = 'data/ufc_events.xlsx'
+    rounds_store = None
+    if args.layout == 'normalized':
+        if args.storage != 'parquet':
+            parser.error('--layout normalized requires --storage parquet')
+        output_store = open_store(DEFAULT_FIGHTS_PATH, key_columns=['fight_url'])
+        rounds_store = open_store(DEFAULT_ROUNDS_PATH)
+        events_store = open_store('data/ufc_events.parquet', seed_from=events_excel)
+    elif args.storage == 'parquet':
+        output_store = open_store('data/ufc_fight_details.parquet', seed_from=output_excel, key_columns=['fight_url'])
+        events_store = open_store('data/ufc_events.parquet', seed_from=events_excel)
+    else:
+        output_store = open_store(output_excel, key_columns=['fight_url'])
+        events_store = open_store(events_excel)
+    
+    output_checkpoint = f"{output_store.path}.checkpoint.json"
+    if args.restart:
+        Checkpoint(output_checkpoint).clear()
     
     # Get already processed fights
-    processed_fights = get_already_processed_fights(output_file)
+    processed_fights = get_already_processed_fights(output_store)
     
-    # Get all fight URLs from events file
-    events = pd.read_excel('data/ufc_events.xlsx')
+    fighter_store = FighterStore(args.fighter_store, ttl_days=args.fighter_ttl_days, refresh=args.refresh_fighters)
+    
+    # Get all fight URLs from the events data
+    events = events_store.read(columns=['fight_link'])
     fight_urls = events['fight_link'].tolist()
     
-    # Process only new fights
-    new_data = process_fights(
-        fight_urls,
-        processed_fights=processed_fights,
-        #max_fights=2
-    )
+    # Process only new fights, flushing to the store every few fights
+    try:
+        rows_written = stream_fights(
+            fight_urls,
+            output_store,
+            Checkpoint(output_checkpoint),
+            processed_fights=processed_fights,
+            #max_fights=2
+            render=args.render,
+            fighter_store=fighter_store,
+            flush_every=args.flush_every,
+            rounds_store=rounds_store
+        )
+    finally:
+        shutdown_browser_pool()
     
-    # If we have new data, merge with existing data and save
-    if not new_data.empty:
-        if os.path.exists(output_file):
-            # Load existing data
-            existing_data = pd.read_excel(output_file)
-            
-            # Concatenate with new data
-            combined_data = pd.concat([existing_data, new_data], ignore_index=True)
-            print(f"Combined {len(existing_data)} existing rows with {len(new_data)} new rows")
-            
-            # Save the combined data
-            combined_data.to_excel(output_file, index=False)
-            print(f"\nData saved to {output_file}")
-            
-            # Display summary
-            print(f"\nTotal: {len(combined_data)} rounds from {len(combined_data['fight_url'].unique())} fights")
-        else:
-            # Just save the new data if no existing file
-            new_data.to_excel(output_file, index=False)
-            print(f"\nData saved to {output_file}")
-            
-            # Display summary
-            print(f"\nProcessed {len(new_data)} rounds from {len(new_data['fight_url'].unique())} fights")
+    if rows_written:
+        # Display summary
+        print(f"\nAdded {rows_written} rounds, total: {len(output_store.keys('fight_url'))} fights")
+        
+        if args.export_excel and args.layout == 'rounds' and args.storage == 'parquet':
+            export_excel(output_store, output_excel)
     else:
         print("\nNo new data to save.")
     
     print("\nColumns in dataset:")
-    if not new_data.empty:
-        print(new_data.columns.tolist())
-    elif os.path.exists(output_file):
-        existing_data = pd.read_excel(output_file)
-        print(existing_data.columns.tolist())
+    if output_store.exists():
+        print(output_store.columns())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
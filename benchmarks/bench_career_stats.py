@@ -0,0 +1,84 @@
+"""
+Benchmark of the career stats of fighters before a fight.
+
+Builds a synthetic per-round history with the compact types of
+ufc_clean.load_fights (categorical fighter names, small integers) and times
+ufc_features.add_career_stats over the history and for a card of matchups
+with plain string names, as prepare_upcoming returns them. Every fighter
+fights at most once per event, so the card (the history's own fights as
+matchups) has to get the same stats as the history itself.
+
+    python benchmarks/bench_career_stats.py --fighters 500 --events 200
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from ufc_clean import FIGHT_DTYPES, apply_dtypes
+from ufc_features import CAREER_STATS, CORNERS, add_career_stats
+
+def make_history(fighters: int, events: int, bouts: int, seed: int = 0) -> pd.DataFrame:
+    """Typed per-round history: `bouts` fights of distinct fighters per event, 1 to 5 rounds each"""
+    rng = np.random.default_rng(seed)
+    names = np.array([f'fighter {i}' for i in range(fighters)])
+    fights = []
+    for event in range(events):
+        pairs = rng.permutation(fighters)[:2 * bouts].reshape(-1, 2)
+        for red, blue in pairs:
+            fights.append((pd.Timestamp('2010-01-01') + pd.Timedelta(days=21 * event), names[red], names[blue]))
+    fights = pd.DataFrame(fights, columns=['event_date', 'red_fighter_name', 'blue_fighter_name'])
+    fights['red_fighter_win'] = rng.integers(0, 2, len(fights))
+    fights['final_time'] = rng.integers(10, 300, len(fights))
+
+    rounds = rng.integers(1, 6, len(fights))
+    df = fights.loc[fights.index.repeat(rounds)].reset_index(drop=True)
+    df['round'] = np.concatenate([np.arange(1, n + 1) for n in rounds])
+    for corner in CORNERS:
+        df[f'{corner}_sig_str_attempted'] = rng.integers(0, 60, len(df))
+        df[f'{corner}_sig_str_landed'] = rng.integers(0, df[f'{corner}_sig_str_attempted'] + 1)
+        df[f'{corner}_td_attempted'] = rng.integers(0, 5, len(df))
+        df[f'{corner}_td_landed'] = rng.integers(0, df[f'{corner}_td_attempted'] + 1)
+        df[f'{corner}_sub_att'] = rng.integers(0, 2, len(df))
+    return apply_dtypes(df, FIGHT_DTYPES)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the career stats of fighters before a fight')
+    parser.add_argument('--fighters', type=int, default=400, help='Number of fighters (default: 400)')
+    parser.add_argument('--events', type=int, default=150, help='Number of events (default: 150)')
+    parser.add_argument('--bouts', type=int, default=12, help='Fights per event (default: 12)')
+    args = parser.parse_args()
+
+    history = make_history(args.fighters, args.events, args.bouts)
+    card = history.drop_duplicates(subset=['event_date', 'red_fighter_name', 'blue_fighter_name'], keep='last')
+    matchups = card[['event_date', 'red_fighter_name', 'blue_fighter_name']].astype(
+        {'red_fighter_name': object, 'blue_fighter_name': object}).reset_index(drop=True)
+    print(f"{len(history)} rounds of {len(card)} fights, names {history['red_fighter_name'].dtype}")
+
+    start = time.perf_counter()
+    in_history = add_career_stats(history)
+    history_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    as_of = add_career_stats(history, target=matchups)
+    target_time = time.perf_counter() - start
+
+    print(f"history (one row per round)  {history_time:8.3f} s")
+    print(f"card of {len(matchups)} matchups      {target_time:8.3f} s")
+
+    columns = [f'{corner}_fighter_{stat}' for corner in CORNERS for stat in CAREER_STATS]
+    expected = in_history.loc[card.index, columns].reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(as_of[columns], expected, check_dtype=False)
+    except AssertionError as e:
+        raise SystemExit(f"Card and history career stats differ: {e}")
+    print("Card and history career stats are the same")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark of the cached enrichment pipeline (ufc_enrich).
+
+Writes synthetic scraped fights, events and upcoming bouts to a temporary
+directory and runs the pipeline on them twice, each time in a new process.
+The first run computes every stage. The second has to load every cached
+stage from the cache, so cache keys can't depend on anything that differs
+between processes (e.g. memory addresses).
+
+    python benchmarks/bench_enrich_pipeline.py --fights 400
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from ufc_storage import open_store
+
+STATS = ['sig_str', 'total_str', 'td', 'head', 'body', 'leg', 'distance', 'clinch', 'ground']
+
+def make_stores(directory: str, fights: int, fighters: int = 60, seed: int = 0) -> None:
+    """Scraped-looking (text) fights, events and upcoming bouts, like the scrapers store them"""
+    rng = np.random.default_rng(seed)
+    names = [f'Fighter {i}' for i in range(fighters)]
+    profiles = {name: {
+        'reach': f'{rng.integers(60, 80)}"' if rng.random() < 0.8 else '--',
+        'height': f"{rng.integers(5, 7)}' {rng.integers(0, 12)}\"",
+        'weight': f'{rng.choice([125, 135, 155, 170, 185, 205, 250])} lbs.',
+        'stance': rng.choice(['Orthodox', 'Southpaw', None]),
+        'dob': f'Jan {rng.integers(1, 28):02d}, {rng.integers(1980, 2000)}' if rng.random() < 0.9 else '--',
+    } for name in names}
+
+    rows, events = [], []
+    for fight in range(fights):
+        event_name = f'UFC {fight // 10}'
+        event_date = (pd.Timestamp('2015-01-01') + pd.Timedelta(days=28 * (fight // 10))).strftime('%B %d, %Y')
+        fight_url = f'http://ufcstats.com/fight-details/{fight:06d}'
+        events.append({'event_name': event_name, 'event_date': event_date, 'fight_link': fight_url})
+        red, blue = rng.choice(names, 2, replace=False)
+        status = rng.choice(['W', 'L', 'D'], p=[0.5, 0.45, 0.05])
+        final_time = f'{rng.integers(0, 5)}:{rng.integers(10, 60):02d}'
+        for round_num in range(1, rng.integers(1, 4) + 1):
+            row = {'event_name': event_name, 'fight_type': 'Lightweight Bout', 'method': 'KO/TKO',
+                   'time_format': '3 Rnd (5-5-5)', 'referee': 'Herb Dean', 'finish_details': None,
+                   'fight_url': fight_url, 'round': round_num, 'final_time': final_time,
+                   'red_fighter_name': red, 'blue_fighter_name': blue, 'red_fighter_status': status,
+                   'blue_fighter_status': {'W': 'L', 'L': 'W', 'D': 'D'}[status],
+                   'red_fighter_link': '', 'blue_fighter_link': ''}
+            for corner, name in (('red', red), ('blue', blue)):
+                row.update({f'{corner}_fighter_{key}': value for key, value in profiles[name].items()})
+                for stat in STATS:
+                    attempted = rng.integers(0, 30)
+                    row[f'{corner}_{stat}_landed'] = str(rng.integers(0, attempted + 1))
+                    row[f'{corner}_{stat}_attempted'] = str(attempted)
+                row.update({f'{corner}_sig_str_pct': f'{rng.integers(0, 100)}', f'{corner}_td_pct': '---',
+                            f'{corner}_kd': str(rng.integers(0, 2)), f'{corner}_sub_att': str(rng.integers(0, 2)),
+                            f'{corner}_rev': '0', f'{corner}_ctrl': f'0:{rng.integers(0, 60):02d}'})
+            rows.append(row)
+
+    upcoming = []
+    for bout in range(8):
+        red, blue = rng.choice(names, 2, replace=False)
+        row = {'event_name': 'UFC Next', 'event_date': 'December 05, 2026', 'event_location': '', 'event_link': '',
+               'fight_link': f'http://ufcstats.com/fight-details/next{bout}', 'weight_class': 'Lightweight Bout',
+               'fighter1': red, 'fighter2': blue, 'content_hash': f'{bout:064x}'}
+        for key, name in (('fighter1', red), ('fighter2', blue)):
+            profile = profiles[name]
+            row.update({f'{key}_height': profile['height'], f'{key}_reach': profile['reach'],
+                        f'{key}_weight': profile['weight'], f'{key}_stance': profile['stance'],
+                        f'{key}_dob': None if profile['dob'] == '--' else profile['dob']})
+        upcoming.append(row)
+
+    open_store(os.path.join(directory, 'fights.parquet')).append(pd.DataFrame(rows))
+    open_store(os.path.join(directory, 'events.parquet')).append(pd.DataFrame(events))
+    open_store(os.path.join(directory, 'upcoming.parquet')).append(pd.DataFrame(upcoming))
+
+def run_pipeline(directory: str) -> None:
+    """One pipeline run on the stores of `directory`, as a separate process would do it"""
+    from ufc_enrich import build_pipeline
+
+    pipeline = build_pipeline(open_store(os.path.join(directory, 'fights.parquet')),
+                              open_store(os.path.join(directory, 'events.parquet')),
+                              open_store(os.path.join(directory, 'upcoming.parquet')),
+                              feature_store_path=os.path.join(directory, 'features.sqlite'),
+                              cache_dir=os.path.join(directory, 'cache'),
+                              typed_fights_path=os.path.join(directory, 'fights.typed.parquet'))
+    pipeline.run()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cached enrichment pipeline across processes')
+    parser.add_argument('--fights', type=int, default=300, help='Number of synthetic fights (default: 300)')
+    parser.add_argument('--run', metavar='DIR', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_pipeline(args.run)
+        return
+
+    from ufc_enrich import build_pipeline
+
+    with tempfile.TemporaryDirectory() as directory:
+        make_stores(directory, args.fights)
+        stages = build_pipeline(open_store(directory), open_store(directory), open_store(directory)).stages
+        cached_stages = {name for name, stage in stages.items() if stage.cache}
+
+        for label in ['first run', 'second run']:
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--run', directory], cwd=directory,
+                                    check=True, capture_output=True, text=True).stdout
+            elapsed = time.perf_counter() - start
+            computed = set(re.findall(r'^\[(\w+)\] running$', output, flags=re.MULTILINE)) & cached_stages
+            print(f"{label:11s} {elapsed:7.2f} s, {len(computed)}/{len(cached_stages)} cached stages computed")
+
+        if computed:
+            raise SystemExit(f"The second run computed {sorted(computed)} again instead of loading them from the cache")
+        print("The second run loaded every cached stage from the cache")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Micro-benchmark of the per-round fight page parser.
+
+Compares the legacy path (html.parser soup, extract_round_stats for rounds
+1-5 plus scrape_significant_strikes_per_round on a second parse of the page)
+with the single-pass ufc_parse.parse_round_tables, on saved fight pages.
+Both parsers must return the same stats for every page before they are timed.
+
+Fixtures are the *.html files in --html-dir; a few trimmed fight pages
+(1, 3 and 5 rounds) ship in benchmarks/fixtures. To add more from a previous
+scrape, copy fight pages out of the HTTP response cache:
+
+    python benchmarks/bench_round_parser.py --save-fixtures 50
+"""
+import argparse
+import glob
+import importlib.util
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+
+from ufc_cache import DEFAULT_CACHE_DIR, ResponseCache
+from ufc_parse import HTML_PARSER, make_soup, parse_round_tables
+
+DEFAULT_FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+def load_scraper():
+    """Import 2_UFC_scrape_fight_details.py (not importable by name because of the leading digit)"""
+    path = os.path.join(ROOT, '2_UFC_scrape_fight_details.py')
+    spec = importlib.util.spec_from_file_location('scrape_fight_details', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def save_fixtures(cache_dir: str, fixture_dir: str, count: int) -> None:
+    """Copy up to `count` cached fight-details pages into the fixture directory"""
+    cache = ResponseCache(cache_dir)
+    urls = [row[0] for row in sqlite3.connect(os.path.join(cache_dir, 'index.sqlite')).execute(
+        "SELECT url FROM responses WHERE url LIKE '%/fight-details/%' ORDER BY url LIMIT ?", (count,))]
+    os.makedirs(fixture_dir, exist_ok=True)
+    for url in urls:
+        entry = cache.get(url)
+        if entry is not None:
+            with open(os.path.join(fixture_dir, url.rstrip('/').split('/')[-1] + '.html'), 'wb') as f:
+                f.write(entry.body)
+    print(f"Saved {len(urls)} fight pages to {fixture_dir}")
+
+def legacy_parse(scraper, html: str) -> dict:
+    """Round stats the way scrape_fight_data built them before parse_round_tables"""
+    soup = BeautifulSoup(html, 'html.parser')
+    round_stats = {}
+    for round_num in range(1, 6):
+        round_stats.update(scraper.extract_round_stats(soup, round_num))
+
+    # The significant strikes rows are matched to a corner by fighter name
+    red_fighter_name = scraper.extract_fight_details(soup).get('red_fighter_name', '').strip()
+    for round_data in scraper.scrape_significant_strikes_per_round(html):
+        prefix = 'red' if round_data['fighter'].strip() == red_fighter_name else 'blue'
+        key = f"{prefix}_r{round_data['round']}"
+        round_stats[f'{key}_sig_str_pct'] = round_data['sig_str_pct'].replace('%', '')
+        for stat in ['sig_str', 'head', 'body', 'leg', 'distance', 'clinch', 'ground']:
+            landed, attempted = round_data[stat].split(' of ')
+            round_stats[f'{key}_{stat}_landed'] = landed
+            round_stats[f'{key}_{stat}_attempted'] = attempted
+    return round_stats
+
+def single_pass_parse(html: str) -> dict:
+    return parse_round_tables(make_soup(html))
+
+def check_outputs(scraper, pages, paths) -> None:
+    """Fail unless both parsers return the same round stats for every page"""
+    for path, html in zip(paths, pages):
+        legacy = pd.DataFrame([legacy_parse(scraper, html)])
+        single_pass = pd.DataFrame([single_pass_parse(html)])
+        if legacy.empty:
+            raise AssertionError(f"No round stats parsed from {path}")
+        try:
+            pd.testing.assert_frame_equal(single_pass.sort_index(axis=1), legacy.sort_index(axis=1))
+        except AssertionError as e:
+            raise AssertionError(f"Parsers disagree on {path}: {e}") from e
+
+def time_per_page(parse, pages, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        for html in pages:
+            start = time.perf_counter()
+            parse(html)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the per-round fight page parser')
+    parser.add_argument('--html-dir', default=DEFAULT_FIXTURE_DIR, help='Directory with saved fight pages (*.html)')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of passes over the fixtures (default: 3)')
+    parser.add_argument('--save-fixtures', type=int, metavar='N', help='Copy N cached fight pages into --html-dir and exit')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='HTTP response cache to copy fixtures from')
+    args = parser.parse_args()
+
+    if args.save_fixtures:
+        save_fixtures(args.cache_dir, args.html_dir, args.save_fixtures)
+        return
+
+    paths = sorted(glob.glob(os.path.join(args.html_dir, '*.html')))
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    if not pages:
+        sys.exit(f"No fixtures found in {args.html_dir}, create them with --save-fixtures N after a scrape")
+
+    scraper = load_scraper()
+    check_outputs(scraper, pages, paths)
+    print(f"Both parsers return the same round stats for all {len(pages)} pages")
+    print(f"{len(pages)} fight pages, {args.repeat} passes, single-pass parser uses '{HTML_PARSER}'")
+    for label, parse in [('legacy (5x extract_round_stats + sig strikes)', lambda html: legacy_parse(scraper, html)),
+                         ('single pass (parse_round_tables)', single_pass_parse)]:
+        timings = time_per_page(parse, pages, args.repeat)
+        print(f"{label:48s} mean {statistics.mean(timings) * 1000:7.2f} ms/page, "
+              f"median {statistics.median(timings) * 1000:7.2f} ms/page")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark of the recency-weighted trailing average of fighter stats.
+
+Compares the notebook's per-group loop (re-weighting every prefix of every
+(fighter, stat) group) with the vectorized ufc_features.weighted_trailing_average
+on a synthetic performance table, and checks that both give the same values.
+Also checks ufc_features.add_weighted_trailing_stats on a fighter with two
+bouts on one card, whatever the index labels of the rounds.
+
+    python benchmarks/bench_trailing_average.py --fighters 300 --fights 15
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from ufc_features import add_weighted_trailing_stats, weighted_trailing_average
+
+def make_performances(fighters: int, fights: int, stats: int, seed: int = 0) -> pd.DataFrame:
+    """Long table of (fighter, stat, event_date, value), sorted like the notebook's perf_df"""
+    rng = np.random.default_rng(seed)
+    rows = fighters * fights * stats
+    perf_df = pd.DataFrame({
+        'fighter': np.repeat([f'fighter {i}' for i in range(fighters)], fights * stats),
+        'event_date': np.tile(np.repeat(pd.date_range('2010-01-01', periods=fights, freq='90D'), stats), fighters),
+        'fight_id': np.arange(rows) // stats,
+        'stat': np.tile([f'stat_{i}' for i in range(stats)], fighters * fights),
+        'value': rng.integers(0, 100, rows),
+    })
+    return perf_df.sort_values(by=['fighter', 'stat', 'event_date'])
+
+def legacy_weighted_trailing_average(perf_df: pd.DataFrame, decay_factor: float) -> pd.Series:
+    """The notebook's implementation, with the decay factor as a parameter"""
+    def weighted_trailing_average(group):
+        result = pd.Series(index=group.index)
+
+        for i in range(len(group)):
+            if i == 0:
+                # First fight has no trailing average
+                result.iloc[i] = None
+            else:
+                # Get previous fights
+                prev_fights = group.iloc[:i]
+
+                # Calculate weights based on recency
+                weights = np.power(decay_factor, np.arange(len(prev_fights)-1, -1, -1))
+
+                # Normalize weights to sum to 1
+                weights = weights / weights.sum()
+
+                # Calculate weighted average
+                weighted_avg = (prev_fights['value'] * weights).sum()
+                result.iloc[i] = weighted_avg
+
+        return result
+
+    return perf_df.groupby(['fighter', 'stat']).apply(
+        lambda x: weighted_trailing_average(x)
+    ).reset_index(level=[0, 1], drop=True)
+
+def check_same_card_bouts(decay_factor: float):
+    """
+    Trailing stat of a fighter after two 3-round bouts on one card (early
+    tournaments): the notebook value at their last round of that card, also
+    when the index labels do not follow the row order (as after a sort)
+    """
+    df = pd.DataFrame({
+        'event_date': pd.to_datetime(['2015-02-26'] * 6 + ['2015-05-21']),
+        'red_fighter_name': ['X'] * 7,
+        'blue_fighter_name': ['A'] * 3 + ['B'] * 3 + ['C'],
+        'red_kd': [10, 10, 4, 13, 2, 13, 0],
+        'blue_kd': [0] * 7,
+    })
+    # Notebook weights over the rounds before the last round of the card
+    earlier = df['red_kd'].to_numpy()[:5]
+    expected = np.average(earlier, weights=np.power(decay_factor, np.arange(len(earlier) - 1, -1, -1)))
+
+    for index in (range(7), [3, 4, 5, 0, 1, 2, 6]):
+        shuffled = df.set_axis(list(index))
+        result = add_weighted_trailing_stats(shuffled, ['red_kd'], ['blue_kd'], decay_factor=decay_factor)
+        value = result['red_kd_weighted_trailing'].iloc[-1]
+        if not np.isclose(value, expected):
+            raise SystemExit(f"Same-card bouts with index {list(index)}: {value:.4f}, expected {expected:.4f}")
+    print(f"same-card bouts: {expected:.4f} whatever the index labels")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the weighted trailing average of fighter stats')
+    parser.add_argument('--fighters', type=int, default=200, help='Number of fighters (default: 200)')
+    parser.add_argument('--fights', type=int, default=15, help='Fights per fighter (default: 15)')
+    parser.add_argument('--stats', type=int, default=10, help='Stats per fight (default: 10)')
+    parser.add_argument('--decay-factor', type=float, default=0.5, help='Decay factor (default: 0.5)')
+    args = parser.parse_args()
+
+    perf_df = make_performances(args.fighters, args.fights, args.stats)
+    print(f"{len(perf_df)} performance rows, {args.fighters * args.stats} (fighter, stat) groups")
+
+    start = time.perf_counter()
+    legacy = legacy_weighted_trailing_average(perf_df, args.decay_factor)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = weighted_trailing_average(perf_df, decay_factor=args.decay_factor)
+    vectorized_time = time.perf_counter() - start
+
+    legacy = legacy.reindex(perf_df.index).astype(float)
+    max_diff = np.nanmax(np.abs(legacy.to_numpy() - vectorized.to_numpy()))
+    same_missing = (legacy.isna() == vectorized.isna()).all()
+    print(f"legacy per-group loop   {legacy_time:8.3f} s")
+    print(f"vectorized EWMA         {vectorized_time:8.3f} s  ({legacy_time / vectorized_time:.0f}x faster)")
+    print(f"max abs difference {max_diff:.2e}, same missing values: {same_missing}")
+    if not same_missing or not np.allclose(legacy, vectorized, rtol=1e-9, atol=1e-9, equal_nan=True):
+        raise SystemExit("Results differ")
+    check_same_card_bouts(args.decay_factor)
+
+if __name__ == '__main__':
+    main()
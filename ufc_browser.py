@@ -0,0 +1,132 @@
+import atexit
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Optional
+
+class BrowserPool:
+    """
+    Small pool of reusable headless Chrome drivers.
+
+    Nothing is imported or started until a page actually needs rendering.
+    Drivers are created on demand up to `size`, handed out one caller at a
+    time, and quit and replaced after `max_pages` pages to keep Chrome's
+    memory in check. Call shutdown() (also registered at exit) to quit them.
+    """
+    def __init__(self, size: int = 1, max_pages: int = 50, page_wait: float = 0.5):
+        self.size = size
+        self.max_pages = max_pages
+        self.page_wait = page_wait
+        self.idle: Deque = deque()
+        self.created = 0
+        self.page_counts = {}
+        # Guards idle and created, notified whenever a driver or a slot for one becomes available
+        self.available = threading.Condition()
+        self.closed = False
+
+    def _start_driver(self):
+        # Selenium is only imported once a browser is really needed
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")  # Run in headless mode (no GUI)
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        # Add these new options to suppress warnings
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--log-level=3")  # Only show fatal errors
+        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+
+        # Make sure you have chromedriver installed
+        return webdriver.Chrome(options=chrome_options)
+
+    def _quit_driver(self, driver) -> None:
+        self.page_counts.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error shutting down browser: {e}")
+
+    def _acquire(self):
+        with self.available:
+            while True:
+                if self.closed:
+                    raise RuntimeError("Browser pool has been shut down")
+                if self.idle:
+                    return self.idle.popleft()
+                if self.created < self.size:
+                    self.created += 1
+                    break
+                # Every driver is busy, wait until one is released, recycled or the pool shuts down
+                self.available.wait()
+        try:
+            driver = self._start_driver()
+        except Exception:
+            with self.available:
+                self.created -= 1
+                self.available.notify()
+            raise
+        self.page_counts[id(driver)] = 0
+        return driver
+
+    def _release(self, driver) -> None:
+        self.page_counts[id(driver)] = self.page_counts.get(id(driver), 0) + 1
+        recycle = self.page_counts[id(driver)] >= self.max_pages
+        if self.closed or recycle:
+            self._quit_driver(driver)
+            with self.available:
+                # Frees a slot, a waiting caller starts a new driver
+                self.created -= 1
+                self.available.notify()
+            return
+        with self.available:
+            self.idle.append(driver)
+            self.available.notify()
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver from the pool for the duration of the with block"""
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            self._release(driver)
+
+    def render(self, url: str, wait: Optional[float] = None) -> str:
+        """Load a page in a pooled browser and return the rendered HTML"""
+        with self.driver() as driver:
+            driver.get(url)
+            time.sleep(self.page_wait if wait is None else wait)
+            return driver.page_source
+
+    def shutdown(self) -> None:
+        """Quit every idle driver; drivers still in use are quit when they are released"""
+        with self.available:
+            self.closed = True
+            drivers = list(self.idle)
+            self.idle.clear()
+            self.created -= len(drivers)
+            # Waiting callers get the shut down error instead of blocking forever
+            self.available.notify_all()
+        for driver in drivers:
+            self._quit_driver(driver)
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+def get_browser_pool(size: int = 1, max_pages: int = 50) -> BrowserPool:
+    """Return the shared browser pool, creating it (but no browser yet) on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = BrowserPool(size=size, max_pages=max_pages)
+            atexit.register(_pool.shutdown)
+    return _pool
+
+def shutdown_browser_pool() -> None:
+    """Quit all browsers of the shared pool, if one was ever created"""
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
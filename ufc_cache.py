@@ -0,0 +1,167 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_CACHE_DIR = os.path.join('data', 'http_cache')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+class CachedResponse:
+    """A response body served from the cache together with its validators"""
+    def __init__(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str],
+                 immutable: bool, fetched_at: float):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.immutable = immutable
+        self.fetched_at = fetched_at
+
+    @property
+    def text(self) -> str:
+        return self.body.decode('utf-8', errors='replace')
+
+class ResponseCache:
+    """
+    Content-addressed on-disk HTTP response cache keyed by URL.
+
+    Bodies are stored once per SHA-256 digest under `blobs/`, a small SQLite
+    index maps URLs to digests and validators (ETag / Last-Modified). When the
+    total size of the stored bodies exceeds `max_bytes`, the least recently
+    used URLs are evicted until it fits again.
+    """
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.max_bytes = max_bytes
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                immutable INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access)")
+        self.conn.commit()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Return the cached response for `url` and mark it as recently used, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT digest, etag, last_modified, immutable, fetched_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            digest, etag, last_modified, immutable, fetched_at = row
+            try:
+                with open(self._blob_path(digest), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                # Blob went missing, drop the dangling index entry
+                self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        return CachedResponse(url, body, etag, last_modified, bool(immutable), fetched_at)
+
+    def put(self, url: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None,
+            immutable: bool = False) -> None:
+        """Store a response body for `url`, replacing any previous entry"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        now = time.time()
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+
+            old = self.conn.execute("SELECT digest FROM responses WHERE url = ?", (url,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, digest, size, etag, last_modified, immutable, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, len(body), etag, last_modified, int(immutable), now, now)
+            )
+            if old and old[0] != digest:
+                self._delete_blob_if_unused(old[0])
+            self.conn.commit()
+            self._evict()
+
+    def touch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Record a successful revalidation (HTTP 304) for `url`"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET fetched_at = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (time.time(), etag, last_modified, url)
+            )
+            self.conn.commit()
+
+    def total_size(self) -> int:
+        """Total size in bytes of all distinct stored bodies"""
+        row = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM responses)"
+        ).fetchone()
+        return row[0]
+
+    def _delete_blob_if_unused(self, digest: str) -> None:
+        in_use = self.conn.execute("SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        if not in_use:
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until the cache fits in max_bytes (lock must be held)"""
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for url, digest, size in self.conn.execute(
+                "SELECT url, digest, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            in_use = self.conn.execute("SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+            if not in_use:
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+                total -= size
+            evicted += 1
+        self.conn.commit()
+        print(f"Response cache: evicted {evicted} entries, {total / 1024 ** 2:.1f} MB in use")
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+def conditional_headers(entry: CachedResponse) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers for revalidating a cached entry"""
+    headers = {}
+    if entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
@@ -0,0 +1,296 @@
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CORNERS = ('red', 'blue')
+
+DEFAULT_TYPED_FIGHTS_PATH = os.path.join('data', 'ufc_fight_details.typed.parquet')
+
+# Upper weight limit (lbs) of every weight class, lightest first; heavier fighters are Heavyweights
+WEIGHT_CLASS_LIMITS = [
+    (125, 'Flyweight'),
+    (135, 'Bantamweight'),
+    (145, 'Featherweight'),
+    (155, 'Lightweight'),
+    (170, 'Welterweight'),
+    (185, 'Middleweight'),
+    (205, 'Light Heavyweight'),
+]
+
+def _leading_number(values: pd.Series) -> pd.Series:
+    """The number at the start of every value ('72"' -> 72, '155 lbs.' -> 155), NaN for '--' and missing values"""
+    extracted = values.astype('string').str.extract(r'^\s*(\d+(?:\.\d+)?)', expand=False)
+    return pd.to_numeric(extracted, errors='coerce').astype(float)
+
+def parse_reach(values: pd.Series) -> pd.Series:
+    """Reach in inches from '72"' strings (or numbers)"""
+    return _leading_number(values)
+
+def parse_weight(values: pd.Series) -> pd.Series:
+    """Weight in lbs from '155 lbs.' strings (or numbers)"""
+    return _leading_number(values)
+
+def parse_height(values: pd.Series) -> pd.Series:
+    """Height in whole centimeters from 5' 11" strings"""
+    parts = values.astype('string').str.extract(r"^\s*(\d+)'\s*(\d+)")
+    feet = pd.to_numeric(parts[0], errors='coerce').astype(float)
+    inches = pd.to_numeric(parts[1], errors='coerce').astype(float)
+    return (feet * 30.48 + inches * 2.54).round()
+
+def parse_count(values: pd.Series) -> pd.Series:
+    """Counts ('3', the halves of 'X of Y' splits) as numbers, 0 when missing"""
+    return _leading_number(values).fillna(0)
+
+def parse_pct(values: pd.Series) -> pd.Series:
+    """Percentages ('45%' or '45') as fractions, 0 for '---' and missing values"""
+    return (_leading_number(values) / 100).fillna(0)
+
+def parse_duration(values: pd.Series) -> pd.Series:
+    """'M:SS' durations in seconds, 0 when missing or malformed"""
+    parts = values.astype('string').str.extract(r'^\s*(\d+(?:\.\d+)?):(\d+(?:\.\d+)?)\s*$')
+    minutes = pd.to_numeric(parts[0], errors='coerce').astype(float)
+    seconds = pd.to_numeric(parts[1], errors='coerce').astype(float)
+    return (minutes * 60 + seconds).fillna(0)
+
+def parse_date(values: pd.Series) -> pd.Series:
+    """'Jul 13, 1988' dates, NaT when missing or malformed"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, format='%b %d, %Y', errors='coerce')
+
+# Parser of every scraped column of the per-round fight table, by column name pattern (first match wins)
+FIGHT_SCHEMA: List[Tuple[str, Callable[[pd.Series], pd.Series]]] = [
+    (r'_pct$', parse_pct),
+    (r'_ctrl$', parse_duration),
+    (r'^final_time$', parse_duration),
+    (r'_dob$', parse_date),
+    (r'^(red|blue)_(?!fighter_).*_(landed|attempted)$', parse_count),
+    (r'^(red|blue)_(kd|sub_att|rev)$', parse_count),
+]
+
+# Parser of the fighter attributes of the upcoming bouts (after the fighter1/fighter2 -> red/blue renaming)
+UPCOMING_SCHEMA: List[Tuple[str, Callable[[pd.Series], pd.Series]]] = [
+    (r'_fighter_height$', parse_height),
+    (r'_fighter_reach$', parse_reach),
+    (r'_fighter_weight$', parse_weight),
+    (r'_dob$', parse_date),
+]
+
+def parse_columns(df: pd.DataFrame, schema: List[Tuple[str, Callable[[pd.Series], pd.Series]]] = FIGHT_SCHEMA) -> pd.DataFrame:
+    """
+    Convert the raw (text) columns of `df` to numbers and dates: every column
+    goes through the parser of the first `schema` pattern it matches, columns
+    without a match are kept as they are. Returns a copy of `df`.
+    """
+    patterns = [(re.compile(pattern), parse) for pattern, parse in schema]
+    parsed = {}
+    for col in df.columns:
+        for pattern, parse in patterns:
+            if pattern.search(col):
+                parsed[col] = parse(df[col])
+                break
+    return df.assign(**parsed)
+
+# Storage type of every parsed column of the per-round fight table, by column name pattern (first match wins).
+# Per-round counts are small: knockdowns, submission attempts, reversals and takedowns fit in int8, strikes
+# and seconds in int16; a column with values out of its type is widened (see _fitting_int_dtype). Columns
+# without a match keep their type.
+FIGHT_DTYPES: List[Tuple[str, str]] = [
+    (r'^(red|blue)_fighter_(name|stance)$', 'category'),
+    (r'^(method|referee|fight_type|time_format)$', 'category'),
+    (r'^round$', 'int8'),
+    (r'^(red|blue)_(kd|sub_att|rev)$', 'int8'),
+    (r'^(red|blue)_td_(landed|attempted)$', 'int8'),
+    (r'^(red|blue)_(?!fighter_).*_(landed|attempted)$', 'int16'),
+    (r'_ctrl$', 'int16'),
+    (r'^final_time$', 'int16'),
+    (r'_pct$', 'float32'),
+    (r'(_dob|^event_date)$', 'datetime64[ns]'),
+]
+
+# Integer types a column is widened through when its values do not fit the schema type
+INT_DTYPES = ['int8', 'int16', 'int32', 'int64']
+
+def _fitting_int_dtype(values: pd.Series, dtype: str, col: str) -> str:
+    """`dtype`, or the smallest wider integer type holding every value of `values` (with a warning)"""
+    if values.empty:
+        return dtype
+    low, high = values.min(), values.max()
+    for candidate in INT_DTYPES[INT_DTYPES.index(dtype):]:
+        info = np.iinfo(candidate)
+        if info.min <= low and high <= info.max:
+            if candidate != dtype:
+                print(f"Warning: {col} has values from {low} to {high}, out of {dtype}, storing it as {candidate}")
+            return candidate
+    raise ValueError(f"{col} has values from {low} to {high}, out of every integer type")
+
+def apply_dtypes(df: pd.DataFrame, schema: List[Tuple[str, str]] = FIGHT_DTYPES) -> pd.DataFrame:
+    """
+    Cast the parsed columns of `df` (see parse_columns) to the compact types
+    of `schema`. The red and blue columns of the same category (e.g. the
+    fighter names) share their categories, so they can be compared and
+    stacked without going back to strings. Returns a copy of `df`.
+    """
+    patterns = [(re.compile(pattern), dtype) for pattern, dtype in schema]
+    dtypes = {}
+    for col in df.columns:
+        for pattern, dtype in patterns:
+            if pattern.search(col):
+                dtypes[col] = dtype
+                break
+
+    # One set of categories per column name without the corner prefix
+    categories = {}
+    for col, dtype in dtypes.items():
+        if dtype == 'category':
+            key = re.sub(r'^(red|blue)_', '', col)
+            categories[key] = categories.get(key, set()) | set(df[col].dropna().astype(str))
+
+    typed = {}
+    for col, dtype in dtypes.items():
+        if dtype == 'category':
+            key = re.sub(r'^(red|blue)_', '', col)
+            values = df[col].astype(object).where(df[col].isna(), df[col].astype(str))
+            typed[col] = values.astype(pd.CategoricalDtype(sorted(categories[key])))
+        elif dtype.startswith('int'):
+            values = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            typed[col] = values.astype(_fitting_int_dtype(values, dtype, col))
+        elif dtype.startswith('datetime'):
+            typed[col] = pd.to_datetime(df[col], errors='coerce').astype(dtype)
+        else:
+            typed[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    return df.assign(**typed)
+
+def join_fight_tables(fights: pd.DataFrame, rounds: pd.DataFrame, key: str = 'fight_url') -> pd.DataFrame:
+    """
+    The per-round fight table from the normalized fights (one row per fight)
+    and rounds (one row per round) tables: the fight-level columns repeated
+    for every round of the fight. A fight or round scraped more than once
+    keeps its last copy, fights without rounds are left out.
+    """
+    fights = fights.drop_duplicates(subset=key, keep='last')
+    rounds = rounds.drop_duplicates(subset=[key, 'round'], keep='last')
+    return fights.merge(rounds, on=key, how='inner')
+
+def load_fights(store, typed_path: Optional[str] = DEFAULT_TYPED_FIGHTS_PATH, rounds_store=None) -> pd.DataFrame:
+    """
+    The per-round fight table of `store`, parsed (FIGHT_SCHEMA) and cast to
+    compact types (FIGHT_DTYPES). With `rounds_store`, `store` holds the
+    normalized fights table and the two are joined (join_fight_tables).
+
+    With `typed_path` the typed table is also written to that Parquet file,
+    which keeps the categoricals and small integer types, together with the
+    signature of `store`. Later loads read it directly until the store changes.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    signature = store.signature()
+    if rounds_store is not None:
+        signature = f"{signature}+{rounds_store.signature()}"
+    signature = signature.encode()
+    if typed_path and os.path.exists(typed_path):
+        metadata = pq.read_schema(typed_path).metadata or {}
+        if metadata.get(b'ufc_source_signature') == signature:
+            return pq.read_table(typed_path).to_pandas()
+
+    raw = store.read() if rounds_store is None else join_fight_tables(store.read(), rounds_store.read())
+    df = apply_dtypes(parse_columns(raw, FIGHT_SCHEMA), FIGHT_DTYPES)
+
+    if typed_path:
+        directory = os.path.dirname(typed_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'ufc_source_signature': signature})
+        # Write under a temporary name and rename, so a crash never leaves a half-written file
+        pq.write_table(table, typed_path + '.tmp')
+        os.replace(typed_path + '.tmp', typed_path)
+    return df
+
+# Parser of every physical attribute and how the mean is rounded when it fills a gap
+PHYSICAL_ATTRIBUTES = {
+    'reach': (parse_reach, np.trunc),
+    'weight': (parse_weight, np.trunc),
+    'height': (parse_height, np.round),
+}
+
+def weight_class(weights: pd.Series) -> pd.Series:
+    """Weight class name of every weight in lbs (missing weights are Heavyweight, as in the notebook)"""
+    limits = np.array([limit for limit, _ in WEIGHT_CLASS_LIMITS], dtype=float)
+    names = np.array([name for _, name in WEIGHT_CLASS_LIMITS] + ['Heavyweight'], dtype=object)
+    values = weights.to_numpy(dtype=float, na_value=np.inf)
+    return pd.Series(names[np.searchsorted(limits, values, side='left')], index=weights.index)
+
+def _fighter_weight_classes(df: pd.DataFrame) -> List[pd.Series]:
+    """Weight class of both corners from the fighter's weight, or the opponent's if it is missing (NaN without either)"""
+    weights = [parse_weight(df[f'{corner}_fighter_weight']) for corner in CORNERS]
+    weights = [own.fillna(other) for own, other in zip(weights, weights[::-1])]
+    return [weight_class(fighter_weights).where(fighter_weights.notna()) for fighter_weights in weights]
+
+def fit_physical_attribute(df: pd.DataFrame, attribute: str, fallback: str = 'mean') -> Dict:
+    """
+    Fill values of a parsed physical attribute: the first known value of every
+    fighter (red corner rows before blue corner rows), the overall mean of the
+    values after filling with those and, for the 'weight_class' fallback, the
+    mean of every weight class. Used by fill_physical_attribute.
+    """
+    if fallback not in ('mean', 'weight_class'):
+        raise ValueError(f"fallback must be 'mean' or 'weight_class', got {fallback!r}")
+
+    _, round_mean = PHYSICAL_ATTRIBUTES[attribute]
+    names = [df[f'{corner}_fighter_name'] for corner in CORNERS]
+    values = [df[f'{corner}_fighter_{attribute}'].astype(float) for corner in CORNERS]
+
+    known = pd.DataFrame({'fighter': pd.concat(names, ignore_index=True).astype(object),
+                          'value': pd.concat(values, ignore_index=True)}).dropna()
+    fighter_values = known.groupby('fighter', sort=False)['value'].first()
+
+    filled = pd.concat([corner_values.fillna(fighter_names.map(fighter_values))
+                        for corner_values, fighter_names in zip(values, names)])
+    class_means = None
+    if fallback == 'weight_class':
+        class_means = filled.groupby(pd.concat(_fighter_weight_classes(df))).mean().apply(round_mean)
+    return {'attribute': attribute, 'fighters': fighter_values, 'class_means': class_means,
+            'mean': round_mean(filled.mean())}
+
+def fill_physical_attribute(df: pd.DataFrame, fitted: Dict) -> pd.DataFrame:
+    """Fill the gaps of a parsed physical attribute with the values of fit_physical_attribute. Returns a copy of `df`."""
+    df = df.copy()
+    classes = _fighter_weight_classes(df) if fitted['class_means'] is not None else [None, None]
+    for corner, fighter_classes in zip(CORNERS, classes):
+        col = f"{corner}_fighter_{fitted['attribute']}"
+        values = df[col].astype(float).fillna(df[f'{corner}_fighter_name'].astype(object).map(fitted['fighters']))
+        if fighter_classes is not None:
+            values = values.fillna(fighter_classes.map(fitted['class_means']))
+        df[col] = values.fillna(fitted['mean'])
+    return df
+
+def impute_physical_attributes(df: pd.DataFrame, attributes: Iterable[str] = ('reach', 'weight', 'height'),
+                               fallback: str = 'mean') -> pd.DataFrame:
+    """
+    Parse the '{corner}_fighter_{attribute}' columns to numbers and fill their
+    gaps: first with the fighter's first known value of the attribute (red
+    corner rows before blue corner rows), then with `fallback`:
+
+    - 'mean': the mean over both corners
+    - 'weight_class': the mean over the fighters of the same weight class
+      (from the fighter's weight, or the opponent's if it is missing), then
+      the overall mean for classes without any known value
+
+    Returns a copy of `df`; the attributes are float columns without gaps.
+    """
+    attributes = list(attributes)
+    # Weight goes first so the weight classes of the other attributes come from imputed weights
+    if fallback == 'weight_class' and 'weight' in attributes:
+        attributes.sort(key=lambda attribute: attribute != 'weight')
+
+    for attribute in attributes:
+        parse, _ = PHYSICAL_ATTRIBUTES[attribute]
+        cols = [f'{corner}_fighter_{attribute}' for corner in CORNERS]
+        df = df.assign(**{col: parse(df[col]) for col in cols})
+        df = fill_physical_attribute(df, fit_physical_attribute(df, attribute, fallback))
+    return df
@@ -0,0 +1,552 @@
+"""
+Feature engineering of 3_UFC_data_enrich.ipynb as a pipeline of pure stages.
+
+Every stage is a function of DataFrames, registered with its inputs in
+build_pipeline(). The Pipeline runner caches the output of every stage under
+a key made from its code (and the ufc_* functions it calls), its parameters
+and the keys of its inputs, so after changing one stage only that stage and
+the ones downstream of it are recomputed.
+
+    python ufc_enrich.py --decay-factor 0.5 --physical-fallback mean
+"""
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ufc_clean import (DEFAULT_TYPED_FIGHTS_PATH, UPCOMING_SCHEMA, fill_physical_attribute, fit_physical_attribute,
+                       impute_physical_attributes, load_fights, parse_columns, weight_class)
+from ufc_feature_store import DEFAULT_FEATURE_STORE_PATH, FighterFeatureStore
+from ufc_features import (ROUND_COUNT_PATTERN, add_days_since_last_fight, add_weighted_trailing_stats, aggregate_rounds,
+                           fight_career_stats, fight_ids, fight_table)
+from ufc_storage import open_store
+
+DEFAULT_ENRICH_CACHE_DIR = os.path.join('data', 'enrich_cache')
+
+# Columns of the training set that are not known before a fight or are only used to build features
+TRAINING_DROP_COLUMNS = ['blue_fighter_age', 'blue_fighter_last_fight_days', 'fight_id', 'final_time', 'method',
+                         'red_fighter_age', 'red_fighter_last_fight_days', 'round', 'time_format']
+
+# Stages
+
+def merge_event_dates(fights: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    """Add the event_date of every fight from the events table"""
+    events = events[['event_name', 'event_date']].drop_duplicates(subset='event_name')
+    df = fights.merge(events, on='event_name', how='left')
+    df['event_date'] = pd.to_datetime(df['event_date'])
+    return df
+
+def fight_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fight-level table: one row per fight with the fight-level columns and the
+    aggregate_rounds stats (totals, best rounds, accuracies) in place of the
+    per-round stats
+    """
+    round_columns = ['round'] + [col for col in df.columns if re.match(ROUND_COUNT_PATTERN, col)
+                                 or re.match(r'^(red|blue)_(?!fighter_).*_pct$', col)]
+    fights = df.drop(columns=round_columns).drop_duplicates(subset='fight_url', keep='last')
+    return fights.join(aggregate_rounds(df), on='fight_url').reset_index(drop=True)
+
+def fill_missing_details(df: pd.DataFrame) -> pd.DataFrame:
+    """Fill finish_details from method and missing stances with the most common one, drop unused columns"""
+    df = df.copy()
+    df['finish_details'] = df['finish_details'].fillna(df['method'])
+    df = df.drop(columns=['referee', 'red_fighter_link', 'blue_fighter_link', 'fight_url'], errors='ignore')
+    for col in ['blue_fighter_stance', 'red_fighter_stance']:
+        df[col] = df[col].fillna(df[col].mode()[0])
+    return df
+
+def impute_physicals(df: pd.DataFrame, fallback: str = 'mean') -> pd.DataFrame:
+    """Parse and impute reach, weight and height, fill missing dates of birth with the mean date"""
+    df = impute_physical_attributes(df, fallback=fallback)
+    # The weight class is rebuilt from the weights in add_weight_class
+    df = df.drop(columns=['fight_type', 'event_name', 'finish_details'], errors='ignore')
+    for col in ['red_fighter_dob', 'blue_fighter_dob']:
+        df[col] = df[col].fillna(df[col].mean())
+    return df
+
+def filter_results(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop draws and no contests, and replace the status columns with red_fighter_win"""
+    status_columns = [col for col in df.columns if col.endswith('_status')]
+    df = df[~df[status_columns].isin(['D', 'NC']).any(axis=1)]
+    red_fighter_win = (df['red_fighter_status'] == 'W').astype(int)
+    df = df.drop(columns=status_columns)
+    df.insert(0, 'red_fighter_win', red_fighter_win)
+    return df
+
+def add_weight_class(df: pd.DataFrame) -> pd.DataFrame:
+    """Add weight_class from the red fighter's weight"""
+    red_class = weight_class(df['red_fighter_weight'])
+    blue_class = weight_class(df['blue_fighter_weight'])
+    mismatches = (red_class != blue_class).sum()
+    if mismatches:
+        print(f"Found {mismatches} rows with mismatched weight classes, using the red fighter's")
+    return df.assign(weight_class=red_class)
+
+def add_age(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the age of both fighters at the event, in years with one decimal"""
+    seconds_per_year = 365.25 * 24 * 60 * 60
+    ages = {}
+    for corner in ['red', 'blue']:
+        age = (pd.to_datetime(df['event_date']) - pd.to_datetime(df[f'{corner}_fighter_dob'])).dt.total_seconds()
+        ages[f'{corner}_fighter_age'] = (age / seconds_per_year).round(1)
+    return df.assign(**ages)
+
+def order_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Order the columns (red_fighter_win, names, fight columns, red columns,
+    blue columns) and cast the int64/float64 columns except percentages to int
+    """
+    non_fighter_columns = [col for col in df.columns if not (col.startswith('red') or col.startswith('blue'))]
+    red_columns = [col for col in df.columns if col.startswith('red') and col not in ('red_fighter_win', 'red_fighter_name')]
+    blue_columns = [col for col in df.columns if col.startswith('blue') and col != 'blue_fighter_name']
+    df = df[['red_fighter_win', 'red_fighter_name', 'blue_fighter_name'] + non_fighter_columns + red_columns + blue_columns]
+
+    numeric_columns = df.select_dtypes(include=['int64', 'float64']).columns
+    columns_to_convert = [col for col in numeric_columns if not col.endswith('pct')]
+    return df.astype({col: int for col in columns_to_convert})
+
+def stat_columns(df: pd.DataFrame, corner: str) -> List[str]:
+    """Numeric per-fight stat columns of a corner ('{corner}_kd', ...), without fighter attributes"""
+    return [col for col in df.columns if col.startswith(f'{corner}_') and not col.startswith(f'{corner}_fighter_')
+            and '_trailing' not in col and pd.api.types.is_numeric_dtype(df[col])]
+
+def add_trailing(df: pd.DataFrame, decay_factor: float = 0.5) -> pd.DataFrame:
+    """Add the weighted trailing averages of every stat, 0 for a fighter's first fight"""
+    df = df.sort_values(by=['event_date', 'red_fighter_name', 'blue_fighter_name', 'round'])
+    df = add_weighted_trailing_stats(df, stat_columns(df, 'red'), stat_columns(df, 'blue'), decay_factor=decay_factor)
+    trailing_cols = [col for col in df.columns if col.endswith('_trailing')]
+    df[trailing_cols] = df[trailing_cols].fillna(0)
+    return df
+
+def fight_features(fights: pd.DataFrame) -> pd.DataFrame:
+    """
+    Days since the previous fight and career stats of both fighters before
+    every fight of a fight table (see fight_table), indexed like it
+    """
+    days = add_days_since_last_fight(fights)[[f'{corner}_fighter_days_since_last' for corner in ['red', 'blue']]]
+    return pd.concat([days, fight_career_stats(fights)], axis=1)
+
+def add_fight_features(df: pd.DataFrame, features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Broadcast the fight_features of every fight to its rounds, add fight_id in
+    chronological order and sort by it
+    """
+    ids = fight_ids(df).to_numpy()
+    per_round = features.reindex(ids)
+    per_round.index = df.index
+    days = [col for col in features.columns if col.endswith('_days_since_last')]
+    df = pd.concat([df, per_round[days]], axis=1)
+    df['fight_id'] = ids
+    df = pd.concat([df, per_round.drop(columns=days)], axis=1)
+    return df.sort_values(['event_date', 'fight_id'], ascending=[True, True]).reset_index(drop=True)
+
+def clean_and_order_columns(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove original performance columns that have been replaced with trailing averages,
+    and order columns in a specific pattern: non-fighter columns first, then red fighter columns,
+    then blue fighter columns (all in alphabetical order within their groups).
+    """
+    # Keep columns that are not per-fight stats: fight columns, fighter attributes, trailing averages
+    # and days since last fight
+    columns_to_keep = [col for col in dataframe.columns
+                       if not (col.startswith('red_') or col.startswith('blue_'))
+                       or col.startswith('red_fighter_') or col.startswith('blue_fighter_')
+                       or '_trailing' in col or '_days_since_last' in col]
+    cleaned_df = dataframe[columns_to_keep]
+
+    non_fighter_cols = sorted(col for col in cleaned_df.columns if not (col.startswith('red_') or col.startswith('blue_')))
+    red_cols = sorted(col for col in cleaned_df.columns if col.startswith('red_'))
+    blue_cols = sorted(col for col in cleaned_df.columns if col.startswith('blue_'))
+    return cleaned_df[non_fighter_cols + red_cols + blue_cols]
+
+def finalize_training(df: pd.DataFrame) -> pd.DataFrame:
+    """Training set: features only, without in-fight columns, one row per distinct fight"""
+    df = clean_and_order_columns(df)
+    df = df.drop(columns=TRAINING_DROP_COLUMNS, errors='ignore')
+    return df.drop_duplicates()
+
+# Columns of an upcoming bout that the features are built from
+MATCHUP_COLUMNS = ['event_date', 'red_fighter_name', 'blue_fighter_name'] + [
+    f'{corner}_fighter_{attribute}' for corner in ['red', 'blue']
+    for attribute in ['reach', 'height', 'weight', 'stance', 'dob']
+]
+
+def prepare_upcoming(upcoming: pd.DataFrame) -> pd.DataFrame:
+    """
+    Matchups of the scraped upcoming bouts: event date, fighters and their parsed physical attributes.
+    The index is the 'matchup_key' of every bout, its page's content_hash and event date (see
+    refresh_upcoming_cards), so score_upcoming can reuse the features of unchanged bouts. Bouts
+    stored without a content_hash get no key and are always scored again.
+    """
+    df = upcoming.copy()
+    if not pd.api.types.is_datetime64_any_dtype(df['event_date']):
+        df['event_date'] = pd.to_datetime(df['event_date'], format='%B %d, %Y', errors='coerce')
+    content_hash = df['content_hash'] if 'content_hash' in df.columns else pd.Series(None, index=df.index)
+    keys = (content_hash.astype('string') + '@' + df['event_date'].astype('string')).astype(object)
+    df.index = pd.Index(keys.where(keys.notna(), None), name='matchup_key')
+
+    # fighter1/fighter2 -> red_fighter/blue_fighter
+    df = df.rename(columns={col: col.replace('fighter1', 'red_fighter').replace('fighter2', 'blue_fighter')
+                            for col in df.columns})
+    df = df.rename(columns={'red_fighter': 'red_fighter_name', 'blue_fighter': 'blue_fighter_name'})
+
+    # Height (cm), reach (inches), weight (lbs) and dates of birth
+    df = parse_columns(df, UPCOMING_SCHEMA)
+    return df[[col for col in MATCHUP_COLUMNS if col in df.columns]]
+
+class MatchupFeatures:
+    """
+    Features of new matchups, computed the way the training set computes them.
+
+    fit() is called once with the fight history (per-round, as used for the
+    training set) and the training set itself. It appends the history to the
+    fighter feature store and keeps the fill values of the fighter attributes.
+    transform() then builds the features of any batch of matchups (one bout
+    or a whole card, see prepare_upcoming) from the store, without
+    recomputing anything over the history, and returns them with the
+    columns and types of the training set.
+    """
+    def __init__(self, decay_factor: float = 0.5, physical_fallback: str = 'mean',
+                 feature_store_path: str = DEFAULT_FEATURE_STORE_PATH):
+        self.decay_factor = decay_factor
+        self.physical_fallback = physical_fallback
+        self.feature_store_path = feature_store_path
+        self.feature_store = None
+
+    def fit(self, history: pd.DataFrame, training: pd.DataFrame) -> 'MatchupFeatures':
+        stats = [col[len('red_'):] for col in stat_columns(history, 'red')]
+        self.feature_store = FighterFeatureStore(self.feature_store_path, stats=stats, decay_factor=self.decay_factor)
+        print(f"Added {self.feature_store.append(history)} fights to {self.feature_store_path}")
+
+        # Weight first, the weight class fallback of the others needs the weights
+        self.physicals = [fit_physical_attribute(history, attribute, self.physical_fallback)
+                          for attribute in ['weight', 'reach', 'height']]
+
+        # Stance and date of birth: the fighter's own, else the most common stance and the mean date
+        self.attributes = {}
+        for attribute, default in [('stance', lambda values: values.mode()[0]), ('dob', lambda values: values.mean())]:
+            values = pd.concat([history[f'{corner}_fighter_{attribute}'] for corner in ['red', 'blue']], ignore_index=True)
+            names = pd.concat([history[f'{corner}_fighter_name'] for corner in ['red', 'blue']], ignore_index=True)
+            known = pd.DataFrame({'fighter': names.astype(object), 'value': values.astype(object)}).dropna()
+            self.attributes[attribute] = (known.groupby('fighter', sort=False)['value'].first(), default(values))
+
+        self.dtypes = training.dtypes.drop('red_fighter_win', errors='ignore')
+        return self
+
+    def transform(self, matchups: pd.DataFrame) -> pd.DataFrame:
+        if self.feature_store is None:
+            raise RuntimeError("MatchupFeatures has to be fitted before transform")
+
+        df = matchups.copy()
+        for fitted in self.physicals:
+            df = fill_physical_attribute(df, fitted)
+        for attribute, (fighter_values, default) in self.attributes.items():
+            for corner in ['red', 'blue']:
+                col = f'{corner}_fighter_{attribute}'
+                filled = df[col].astype(object).fillna(df[f'{corner}_fighter_name'].astype(object).map(fighter_values))
+                df[col] = filled.fillna(default)
+        df = add_weight_class(df)
+
+        # Trailing averages, career stats and days since last fight as of the matchup's event
+        df = self.feature_store.enrich(df, career_stats=True)
+        df = clean_and_order_columns(df)
+
+        missing = [col for col in self.dtypes.index if col not in df.columns]
+        if missing:
+            raise ValueError(f"Matchup features are missing the training columns {missing}")
+        df = df[list(self.dtypes.index)]
+        # Names and stances are not limited to the categories of the training set
+        return df.astype({col: dtype for col, dtype in self.dtypes.items() if not isinstance(dtype, pd.CategoricalDtype)})
+
+    def close(self) -> None:
+        if self.feature_store is not None:
+            self.feature_store.close()
+
+def score_upcoming(history: pd.DataFrame, training: pd.DataFrame, matchups: pd.DataFrame,
+                   decay_factor: float = 0.5, physical_fallback: str = 'mean',
+                   feature_store_path: str = DEFAULT_FEATURE_STORE_PATH,
+                   previous: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Validation set: the features of the upcoming matchups, with the columns of the training set.
+
+    `previous` is an earlier output for the same history and training set (see Stage.incremental):
+    matchups whose 'matchup_key' (see prepare_upcoming) it already holds keep their features, only
+    new and changed matchups are computed.
+    """
+    reuse = np.zeros(len(matchups), dtype=bool)
+    if previous is not None:
+        previous = previous[previous.index.notna() & ~previous.index.duplicated(keep='last')]
+        reuse = matchups.index.notna() & matchups.index.isin(previous.index)
+        print(f"Reusing the features of {reuse.sum()} unchanged matchups, scoring {(~reuse).sum()}")
+
+    parts = []
+    if reuse.any():
+        parts.append(previous.loc[matchups.index[reuse]].set_axis(np.flatnonzero(reuse)))
+    if not reuse.all():
+        features = MatchupFeatures(decay_factor, physical_fallback, feature_store_path).fit(history, training)
+        try:
+            parts.append(features.transform(matchups[~reuse]).set_axis(np.flatnonzero(~reuse)))
+        finally:
+            features.close()
+    if not parts:
+        return pd.DataFrame(columns=training.columns.drop('red_fighter_win', errors='ignore'),
+                            index=matchups.index)
+    return pd.concat(parts).sort_index().set_axis(matchups.index)
+
+# Runner
+
+def _stable_repr(value, seen: set) -> str:
+    """
+    repr() of a constant that is the same in every process: functions and
+    classes (e.g. the parsers of FIGHT_SCHEMA) by name and fingerprint instead
+    of their memory address, and sets in sorted order
+    """
+    if isinstance(value, (list, tuple)):
+        items = ', '.join(_stable_repr(item, seen) for item in value)
+        return f"[{items}]" if isinstance(value, list) else f"({items})"
+    if isinstance(value, dict):
+        return '{' + ', '.join(f"{_stable_repr(key, seen)}: {_stable_repr(item, seen)}" for key, item in value.items()) + '}'
+    if isinstance(value, (set, frozenset)):
+        return '{' + ', '.join(sorted(_stable_repr(item, seen) for item in value)) + '}'
+    if (inspect.isfunction(value) or inspect.isclass(value)) and value.__module__.startswith('ufc_'):
+        return f"{value.__module__}.{value.__qualname__}:{_fingerprint(value, seen)}"
+    if callable(value):
+        # Library functions and numpy ufuncs by name only
+        return f"{getattr(value, '__module__', None)}.{getattr(value, '__qualname__', getattr(value, '__name__', None))}"
+    return repr(value)
+
+def _fingerprint(obj, seen: Optional[set] = None) -> str:
+    """Source of a function or class and of the ufc_* functions, classes and constants it uses"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return ''
+    seen.add(id(obj))
+
+    parts = [inspect.getsource(obj)]
+    functions = [value for value in vars(obj).values() if inspect.isfunction(value)] if inspect.isclass(obj) else [obj]
+    for function in functions:
+        names = set()
+        code_objects = [function.__code__]
+        while code_objects:
+            code = code_objects.pop()
+            names.update(code.co_names)
+            code_objects.extend(const for const in code.co_consts if inspect.iscode(const))
+
+        for name in sorted(names):
+            value = function.__globals__.get(name)
+            if (inspect.isfunction(value) or inspect.isclass(value)) and value.__module__.startswith('ufc_'):
+                parts.append(_fingerprint(value, seen))
+            elif name.isupper() and isinstance(value, (list, tuple, dict)):
+                parts.append(_stable_repr(value, seen))
+    return '\n'.join(parts)
+
+class Stage:
+    """
+    A step of the pipeline: `func` is called with the outputs of the `inputs`
+    stages as positional arguments and `params` as keyword arguments. Stages
+    without inputs load data; their `version` (e.g. a store signature) stands
+    in for the input keys.
+
+    `incremental` names an input whose rows the output follows one for one.
+    When only that input changed since the last run, `func` also gets the
+    previous output as `previous`, to reuse the rows that did not change.
+    """
+    def __init__(self, name: str, func: Callable[..., pd.DataFrame], inputs: Sequence[str] = (),
+                 params: Optional[Dict] = None, version: Optional[Callable[[], str]] = None, cache: bool = True,
+                 incremental: Optional[str] = None):
+        if incremental is not None and incremental not in inputs:
+            raise ValueError(f"Incremental input '{incremental}' of stage '{name}' is not one of its inputs")
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.version = version
+        self.cache = cache
+        self.incremental = incremental
+
+class Pipeline:
+    """
+    Runs a DAG of stages, listed so every stage comes after its inputs, and
+    keeps the output of every stage in `cache_dir` (no caching without one).
+    """
+    def __init__(self, stages: List[Stage], cache_dir: Optional[str] = DEFAULT_ENRICH_CACHE_DIR):
+        self.stages = {}
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown or later stages {missing}")
+            self.stages[stage.name] = stage
+        self.cache_dir = cache_dir
+        self.keys = {}
+        self.base_keys = {}
+
+    def _base_key(self, name: str) -> str:
+        """Key of everything a stage depends on except its incremental input"""
+        if name not in self.base_keys:
+            stage = self.stages[name]
+            digest = hashlib.sha256()
+            digest.update(name.encode())
+            digest.update(_fingerprint(stage.func).encode())
+            digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+            digest.update((stage.version() if stage.version else '').encode())
+            for input_name in stage.inputs:
+                if input_name != stage.incremental:
+                    digest.update(self._key(input_name).encode())
+            self.base_keys[name] = digest.hexdigest()
+        return self.base_keys[name]
+
+    def _key(self, name: str) -> str:
+        if name not in self.keys:
+            stage = self.stages[name]
+            key = self._base_key(name)
+            if stage.incremental is not None:
+                key = hashlib.sha256((key + self._key(stage.incremental)).encode()).hexdigest()
+            self.keys[name] = key
+        return self.keys[name]
+
+    def _cache_path(self, name: str) -> str:
+        if self.stages[name].incremental is not None:
+            # The base key in the name finds the previous output when only the incremental input changed
+            return os.path.join(self.cache_dir, f"{name}-{self._base_key(name)[:16]}-{self._key(name)[:16]}.pkl")
+        return os.path.join(self.cache_dir, f"{name}-{self._key(name)[:16]}.pkl")
+
+    def _compute(self, name: str, results: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        if name in results:
+            return results[name]
+        stage = self.stages[name]
+        use_cache = self.cache_dir is not None and stage.cache
+        path = self._cache_path(name) if use_cache else None
+
+        if use_cache and os.path.exists(path):
+            print(f"[{name}] cached")
+            results[name] = pd.read_pickle(path)
+            return results[name]
+
+        inputs = [self._compute(input_name, results) for input_name in stage.inputs]
+        params = dict(stage.params)
+        if use_cache and stage.incremental is not None:
+            previous = glob.glob(os.path.join(self.cache_dir, f"{name}-{self._base_key(name)[:16]}-*.pkl"))
+            if previous:
+                params['previous'] = pd.read_pickle(previous[0])
+        print(f"[{name}] running")
+        results[name] = stage.func(*inputs, **params)
+
+        if use_cache:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Outputs of older versions of the stage are never read again
+            for old_path in glob.glob(os.path.join(self.cache_dir, f"{name}-*.pkl")):
+                os.remove(old_path)
+            # Write under a temporary name and rename, so a crash never leaves a half-written file
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(results[name], f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+        return results[name]
+
+    def run(self, targets: Optional[Sequence[str]] = None) -> Dict[str, pd.DataFrame]:
+        """Outputs of the `targets` stages (default: every stage), reusing cached outputs"""
+        results = {}
+        for name in targets or list(self.stages):
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage '{name}'")
+            self._compute(name, results)
+        return {name: results[name] for name in targets or list(self.stages)}
+
+def build_pipeline(fights_store, events_store, upcoming_store=None, decay_factor: float = 0.5,
+                   physical_fallback: str = 'mean', feature_store_path: str = DEFAULT_FEATURE_STORE_PATH,
+                   cache_dir: Optional[str] = DEFAULT_ENRICH_CACHE_DIR, rounds_store=None,
+                   typed_fights_path: Optional[str] = DEFAULT_TYPED_FIGHTS_PATH) -> Pipeline:
+    """
+    The enrichment pipeline of the notebook, from the scraped fights and
+    events to the 'training' stage and, with `upcoming_store`, the
+    'validation' stage. With `rounds_store`, `fights_store` holds the
+    normalized fights table (see load_fights). The 'fight_stats' stage is the
+    fight-level table of the scraped fights.
+    """
+    fights_version = fights_store.signature
+    if rounds_store is not None:
+        fights_version = lambda: f"{fights_store.signature()}+{rounds_store.signature()}"
+    stages = [
+        # Loaders are keyed by the store signatures; load_fights keeps its own typed copy
+        Stage('fights', lambda: load_fights(fights_store, typed_path=typed_fights_path, rounds_store=rounds_store),
+              version=fights_version, cache=False),
+        Stage('events', lambda: events_store.read(columns=['event_name', 'event_date']),
+              version=events_store.signature, cache=False),
+        Stage('merged', merge_event_dates, ['fights', 'events']),
+        Stage('fight_stats', fight_stats, ['merged']),
+        Stage('filled', fill_missing_details, ['merged']),
+        Stage('physicals', impute_physicals, ['filled'], params={'fallback': physical_fallback}),
+        Stage('results', filter_results, ['physicals']),
+        Stage('weight_classes', add_weight_class, ['results']),
+        Stage('ages', add_age, ['weight_classes']),
+        Stage('ordered', order_columns, ['ages']),
+        Stage('trailing', add_trailing, ['ordered'], params={'decay_factor': decay_factor}),
+        # Days since last fight and career stats are per fight: computed on the fight table, then broadcast
+        Stage('fight_table', fight_table, ['ordered']),
+        Stage('fight_features', fight_features, ['fight_table']),
+        Stage('career', add_fight_features, ['trailing', 'fight_features']),
+        Stage('training', finalize_training, ['career']),
+    ]
+    if upcoming_store is not None:
+        stages += [
+            Stage('upcoming', lambda: upcoming_store.read(), version=upcoming_store.signature, cache=False),
+            Stage('upcoming_prepared', prepare_upcoming, ['upcoming']),
+            Stage('validation', score_upcoming, ['career', 'training', 'upcoming_prepared'],
+                  params={'decay_factor': decay_factor, 'physical_fallback': physical_fallback,
+                          'feature_store_path': feature_store_path}, incremental='upcoming_prepared'),
+        ]
+    return Pipeline(stages, cache_dir=cache_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the UFC training and validation sets from the scraped data')
+    parser.add_argument('--decay-factor', type=float, default=0.5, help='Decay factor of the weighted trailing averages (default: 0.5)')
+    parser.add_argument('--physical-fallback', choices=['mean', 'weight_class'], default='mean', help='Fill reach/weight/height unknown for a fighter with the overall or the weight class mean (default: mean)')
+    parser.add_argument('--cache-dir', default=DEFAULT_ENRICH_CACHE_DIR, help=f'Stage output cache directory (default: {DEFAULT_ENRICH_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute every stage and cache nothing')
+    parser.add_argument('--feature-store', default=DEFAULT_FEATURE_STORE_PATH, help=f'Fighter feature store (default: {DEFAULT_FEATURE_STORE_PATH})')
+    parser.add_argument('--no-upcoming', action='store_true', help='Only build the training set')
+    parser.add_argument('--layout', choices=['rounds', 'normalized'], default='rounds',
+                        help='Layout of the scraped fight details, see 2_UFC_scrape_fight_details.py (default: rounds)')
+    parser.add_argument('--fight-stats-output', help='Also write the fight-level table (one row per fight) to this Parquet file')
+    parser.add_argument('--train-output', default='data/train.xlsx', help='Training set output (default: data/train.xlsx)')
+    parser.add_argument('--validation-output', default='data/validation.xlsx', help='Validation set output (default: data/validation.xlsx)')
+    args = parser.parse_args()
+
+    rounds_store = None
+    if args.layout == 'normalized':
+        fights_store = open_store(os.path.join('data', 'ufc_fights.parquet'))
+        rounds_store = open_store(os.path.join('data', 'ufc_rounds.parquet'))
+    else:
+        fights_store = open_store('data/ufc_fight_details.parquet', seed_from='data/ufc_fight_details.xlsx')
+    events_store = open_store('data/ufc_events.parquet', seed_from='data/ufc_events.xlsx')
+    upcoming_store = None
+    if not args.no_upcoming:
+        upcoming_store = open_store('data/ufc_upcoming_events.parquet', seed_from='data/ufc_upcoming_events.xlsx')
+
+    pipeline = build_pipeline(fights_store, events_store, upcoming_store, decay_factor=args.decay_factor,
+                              physical_fallback=args.physical_fallback, feature_store_path=args.feature_store,
+                              cache_dir=None if args.no_cache else args.cache_dir, rounds_store=rounds_store)
+    targets = ['training'] if args.no_upcoming else ['training', 'validation']
+    if args.fight_stats_output:
+        targets.append('fight_stats')
+    results = pipeline.run(targets)
+
+    results['training'].to_excel(args.train_output, index=False)
+    print(f"Wrote {len(results['training'])} training rows to {args.train_output}")
+    if 'validation' in results:
+        results['validation'].to_excel(args.validation_output, index=False)
+        print(f"Wrote {len(results['validation'])} validation rows to {args.validation_output}")
+    if 'fight_stats' in results:
+        results['fight_stats'].to_parquet(args.fight_stats_output, index=False)
+        print(f"Wrote {len(results['fight_stats'])} fights to {args.fight_stats_output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ufc_features import CAREER_STATS, CAREER_TOTALS, CORNERS, _career_stats, fight_ids, fight_totals, stack_corners
+
+DEFAULT_FEATURE_STORE_PATH = os.path.join('data', 'fighter_features.sqlite')
+
+class FighterFeatureStore:
+    """
+    Point-in-time feature store of every fighter, indexed by (fighter, date).
+
+    For every fight of a fighter it keeps a snapshot of their state after the
+    fight: the weighted trailing averages of `stats` (see
+    add_weighted_trailing_stats), the running career totals (see
+    add_career_stats) and the date of the fight. New fights are appended by
+    updating the fighter's latest snapshot, without replaying their history,
+    and "features of fighter X as of date D" is one lookup in the SQLite
+    (fighter, event_date) index.
+
+    The store remembers the stats and decay factor it was built with and a
+    digest of every stored fight, and starts over when the configuration
+    changes. When appended fights are older than a fighter's latest snapshot
+    (a backfilled or resumed scrape) or a stored fight comes back with other
+    stats (a corrected scrape), the snapshots are rebuilt from the appended
+    history, which then has to hold every stored fight.
+    """
+    def __init__(self, path: str = DEFAULT_FEATURE_STORE_PATH, stats: Optional[List[str]] = None,
+                 decay_factor: float = 0.5):
+        self.path = path
+        self.stats = list(stats or [])
+        self.decay_factor = decay_factor
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    seq INTEGER PRIMARY KEY,
+                    fighter TEXT NOT NULL,
+                    event_date TEXT NOT NULL,
+                    fight_key TEXT NOT NULL,
+                    state TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS snapshots_as_of ON snapshots (fighter, event_date, seq)")
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS snapshots_fight ON snapshots (fight_key, fighter)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS fights (fight_key TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+
+        # Stores without fight digests are rebuilt once
+        config = json.dumps({'stats': self.stats, 'decay_factor': self.decay_factor, 'digests': True})
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+        if row is None or row[0] != config:
+            if row is not None:
+                print(f"Feature configuration changed, rebuilding {path}")
+            with self.conn:
+                self._clear()
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('config', ?)", (config,))
+
+    def _clear(self) -> None:
+        self.conn.execute("DELETE FROM snapshots")
+        self.conn.execute("DELETE FROM fights")
+
+    def _digests(self, df: pd.DataFrame) -> pd.Series:
+        """Digest of the rows of every fight ('_fight_key') of a per-round frame, over the columns the features use"""
+        columns = ['event_date', 'red_fighter_name', 'blue_fighter_name', 'red_fighter_win', 'final_time', 'round']
+        columns += [f'{corner}_{stat}' for corner in CORNERS
+                    for stat in self.stats + ['sig_str_landed', 'sig_str_attempted', 'td_landed', 'td_attempted', 'sub_att']]
+        columns = list(dict.fromkeys(col for col in columns if col in df.columns))
+        row_hashes = pd.util.hash_pandas_object(df[columns], index=False)
+        # Sum of the row hashes (mod 2**64): the rounds of a fight in any order give the same digest
+        digests = row_hashes.groupby(df['_fight_key'].to_numpy(), sort=False).sum()
+        return digests.map(lambda value: f'{value:016x}')
+
+    def _needs_rebuild(self, df: pd.DataFrame, digests: pd.Series) -> Optional[str]:
+        """Why the fights of `df` can't be appended to the stored snapshots, None if they can"""
+        stored = pd.Series(dict(self.conn.execute("SELECT fight_key, digest FROM fights").fetchall()), dtype=object)
+        known = digests.index.intersection(stored.index)
+        if (digests[known] != stored[known]).any():
+            return "stored fights changed"
+
+        new = df[~df['_fight_key'].isin(stored.index)]
+        if new.empty:
+            return None
+        latest = dict(self.conn.execute("SELECT fighter, MAX(event_date) FROM snapshots GROUP BY fighter").fetchall())
+        for corner in CORNERS:
+            first_new = (pd.to_datetime(new['event_date']).groupby(new[f'{corner}_fighter_name'].astype(str).to_numpy())
+                         .min().map(lambda date: date.isoformat()))
+            stored_latest = first_new.index.map(latest)
+            if (stored_latest.notna() & (first_new.to_numpy() < stored_latest.fillna(''))).any():
+                return "new fights are older than stored ones"
+        return None
+
+    def _empty_state(self) -> Dict:
+        return {
+            'totals': {col: 0 for col in CAREER_TOTALS},
+            'ewma_sum': [0.0] * len(self.stats),
+            'ewma_weight': [0.0] * len(self.stats),
+            'trailing': None,
+            'last_fight_date': None,
+        }
+
+    def _latest(self, fighter: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT event_date, state FROM snapshots WHERE fighter = ? ORDER BY event_date DESC, seq DESC LIMIT 1",
+            (fighter,)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def as_of(self, fighter: str, event_date) -> Optional[Dict]:
+        """State of `fighter` after their last fight before `event_date`, None if they have none"""
+        row = self.conn.execute(
+            "SELECT state FROM snapshots WHERE fighter = ? AND event_date < ? ORDER BY event_date DESC, seq DESC LIMIT 1",
+            (fighter, pd.Timestamp(event_date).isoformat())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def append(self, df: pd.DataFrame) -> int:
+        """
+        Add the fights of a per-round frame that are not in the store yet.
+        Needs the '{corner}_{stat}' columns of `stats` plus the columns used by
+        fight_totals. Returns the number of fights added.
+        """
+        df = df[df['event_date'].notna()].copy()
+        df['_fight'] = fight_ids(df).to_numpy()
+        df = df.drop(columns=['fight_id'], errors='ignore')
+        df['_fight_key'] = (pd.to_datetime(df['event_date']).dt.strftime('%Y-%m-%d') + '|'
+                            + df['red_fighter_name'].astype(str) + '|' + df['blue_fighter_name'].astype(str))
+        df = df.sort_values(by=['event_date', '_fight'], kind='stable')
+        # Stack on the chronological order, not on the index labels of the caller
+        df['fight_id'] = df['_fight']
+        df = df.reset_index(drop=True)
+
+        digests = self._digests(df)
+        reason = self._needs_rebuild(df, digests)
+        if reason is not None:
+            stored = {row[0] for row in self.conn.execute("SELECT fight_key FROM fights")}
+            if not stored.issubset(digests.index):
+                raise ValueError(f"Can't update {self.path} ({reason}) from a history without all of its fights, "
+                                 f"append the full history to rebuild it")
+            print(f"History changed ({reason}), rebuilding {self.path}")
+            with self.conn:
+                self._clear()
+
+        known = {row[0] for row in self.conn.execute("SELECT fight_key FROM fights")}
+        df = df[~df['_fight_key'].isin(known)]
+        if df.empty:
+            return 0
+
+        totals = fight_totals(df).set_index(['fight_id', 'corner'])
+        stacked = stack_corners(df, [f'red_{stat}' for stat in self.stats], [f'blue_{stat}' for stat in self.stats],
+                                key_cols=['event_date', '_fight', '_fight_key'])
+        values = stacked[self.stats].to_numpy(dtype=float)
+
+        decay = self.decay_factor
+        states = {}
+        snapshots = []
+        # Appearances (one per fighter and round) grouped by fight and fighter, in chronological order
+        for (fight, fighter, corner), positions in stacked.groupby(['_fight', 'fighter', 'corner'], sort=False).indices.items():
+            if fighter not in states:
+                latest = self._latest(fighter)
+                states[fighter] = latest[1] if latest else self._empty_state()
+            state = states[fighter]
+            event_date = pd.Timestamp(stacked['event_date'].iat[positions[0]]).isoformat()
+
+            ewma_sum = np.array(state['ewma_sum'])
+            ewma_weight = np.array(state['ewma_weight'])
+            for position in positions:
+                x = values[position]
+                present = ~np.isnan(x)
+                # Average of the earlier values, only for the stats this round has
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    trailing = np.where(present & (ewma_weight > 0), ewma_sum / ewma_weight, np.nan)
+                if not np.isnan(trailing).all():
+                    state['trailing'] = [None if np.isnan(v) else float(v) for v in trailing]
+                ewma_sum = np.where(present, decay * ewma_sum + np.nan_to_num(x), ewma_sum)
+                ewma_weight = np.where(present, decay * ewma_weight + 1, ewma_weight)
+            state['ewma_sum'] = ewma_sum.tolist()
+            state['ewma_weight'] = ewma_weight.tolist()
+
+            fight_total = totals.loc[(fight, corner)]
+            for col in CAREER_TOTALS:
+                if pd.notna(fight_total[col]):
+                    state['totals'][col] += fight_total[col].item()
+            state['last_fight_date'] = event_date
+
+            snapshots.append((fighter, event_date, stacked['_fight_key'].iat[positions[0]], json.dumps(state)))
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO snapshots (fighter, event_date, fight_key, state) VALUES (?, ?, ?, ?)", snapshots
+            )
+            new_keys = df['_fight_key'].unique()
+            self.conn.executemany("INSERT INTO fights (fight_key, digest) VALUES (?, ?)",
+                                  zip(new_keys, digests[new_keys]))
+        return df['_fight_key'].nunique()
+
+    def enrich(self, card: pd.DataFrame, career_stats: bool = True) -> pd.DataFrame:
+        """
+        Add the features of both fighters as of the event_date of every row of
+        `card`: '{corner}_{stat}_weighted_trailing', the '{corner}_fighter_{stat}'
+        career stats (unless `career_stats` is False) and
+        '{corner}_fighter_days_since_last'. Fighters without earlier fights get 0.
+        """
+        new_columns = {}
+        career_columns = {}
+        days_columns = {}
+        for corner in CORNERS:
+            states = [self.as_of(fighter, event_date) if pd.notna(event_date) else None
+                      for fighter, event_date in zip(card[f'{corner}_fighter_name'], card['event_date'])]
+
+            for i, stat in enumerate(self.stats):
+                new_columns[f'{corner}_{stat}_weighted_trailing'] = [
+                    state['trailing'][i] if state and state['trailing'] and state['trailing'][i] is not None else 0.0
+                    for state in states
+                ]
+
+            last_fight_date = pd.to_datetime(pd.Series([state['last_fight_date'] if state else None for state in states],
+                                                       dtype=object))
+            event_date = pd.Series(pd.to_datetime(card['event_date']).to_numpy())
+            if career_stats:
+                totals = pd.DataFrame([state['totals'] if state else {} for state in states],
+                                      columns=CAREER_TOTALS, dtype=float)
+                stats = _career_stats(totals, last_fight_date, event_date)
+                for col in CAREER_STATS:
+                    career_columns[f'{corner}_fighter_{col}'] = stats[col].to_numpy()
+            days_columns[f'{corner}_fighter_days_since_last'] = (
+                (event_date - last_fight_date).dt.days.fillna(0).astype(int).to_numpy()
+            )
+
+        new_columns.update(career_columns)
+        new_columns.update(days_columns)
+        return pd.concat([card, pd.DataFrame(new_columns, index=card.index)], axis=1)
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,340 @@
+import re
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+CORNERS = ('red', 'blue')
+
+def _trailing_ewma(values: pd.DataFrame, keys, decay_factor: float) -> pd.DataFrame:
+    """Per-group recency-weighted average of the earlier non-missing values of every column"""
+    if not 0 <= decay_factor <= 1:
+        raise ValueError(f"decay_factor must be between 0 and 1, got {decay_factor}")
+
+    grouped = values.astype(float).groupby(keys, sort=False)
+    if decay_factor == 1:
+        averages = grouped.expanding().mean()
+    else:
+        # ignore_na: missing values don't count as a fight when weighting the others
+        averages = grouped.ewm(alpha=1 - decay_factor, adjust=True, ignore_na=True).mean()
+
+    # Back to the rows of `values`, then shift each group by one so a row only sees earlier rows
+    averages = averages.reset_index(level=list(range(len(keys))), drop=True).reindex(values.index)
+    return averages.groupby(keys, sort=False).shift(1)
+
+def weighted_trailing_average(perf_df: pd.DataFrame, decay_factor: float = 0.5,
+                              group_cols=('fighter', 'stat'), value_col: str = 'value') -> pd.Series:
+    """
+    Recency-weighted average of the previous values of every (fighter, stat)
+    group, in the row order of `perf_df`.
+
+    Row i of a group gets sum(decay_factor ** (i - 1 - j) * x[j]) over the
+    earlier rows j, divided by the sum of the weights; the first row of a
+    group gets NaN. This is an adjusted EWMA with alpha = 1 - decay_factor,
+    shifted by one row, so it is computed per group in a single pass instead
+    of re-weighting every prefix.
+
+    A decay factor closer to 1 (e.g. 0.9) means older fights still have
+    significant weight, closer to 0 (e.g. 0.5) makes recent fights much more
+    important; 1 is the plain mean of all previous values.
+    """
+    keys = [perf_df[col] for col in group_cols]
+    return _trailing_ewma(perf_df[[value_col]], keys, decay_factor)[value_col]
+
+def stack_corners(df: pd.DataFrame, red_cols: List[str], blue_cols: List[str],
+                  key_cols: List[str] = ('event_date',)) -> pd.DataFrame:
+    """
+    Corner-stacked view of a fight frame: the red and the blue corner of every
+    row, one below the other, with the 'red_'/'blue_' prefix removed from
+    `red_cols`/`blue_cols` so both corners share one schema.
+
+    Besides the stat columns and `key_cols`, the result has 'fighter' (from
+    '{corner}_fighter_name'), 'corner', 'row' (position of the row in `df`)
+    and 'fight_id' (its index label). Rows are in the order of `df`, red first.
+    """
+    parts = []
+    for corner, cols in zip(CORNERS, (red_cols, blue_cols)):
+        part = df[list(key_cols) + list(cols)].rename(columns={col: col[len(corner) + 1:] for col in cols})
+        part.insert(0, 'fighter', df[f'{corner}_fighter_name'].to_numpy())
+        part.insert(1, 'corner', corner)
+        part.insert(2, 'row', np.arange(len(df)))
+        part.insert(3, 'fight_id', df.index.to_numpy())
+        parts.append(part.reset_index(drop=True))
+
+    stacked = pd.concat(parts, ignore_index=True)
+    order = np.lexsort((stacked['corner'].eq('blue').to_numpy(), stacked['row'].to_numpy()))
+    return stacked.iloc[order].reset_index(drop=True)
+
+def add_weighted_trailing_stats(history: pd.DataFrame, red_stat_cols: List[str], blue_stat_cols: List[str],
+                                target: Optional[pd.DataFrame] = None, decay_factor: float = 0.5) -> pd.DataFrame:
+    """
+    Add '{col}_weighted_trailing' columns for every red and blue stat column:
+    the recency-weighted average (see weighted_trailing_average) of the
+    fighter's earlier values of that stat, as of their last appearance in
+    `history` before the event_date of each row of `target` (default: `history`
+    itself). Fighters without earlier appearances get 0.
+
+    Works on the corner-stacked frame (see stack_corners) instead of one
+    Python object per (row, corner, stat).
+    """
+    if target is None:
+        target = history
+
+    # Every appearance of every fighter, in chronological order
+    stacked = stack_corners(history, red_stat_cols, blue_stat_cols)
+    stat_cols = [col for col in stacked.columns if col not in ('fighter', 'corner', 'row', 'fight_id', 'event_date')]
+    stacked = stacked.sort_values(by=['fighter', 'event_date'], kind='stable')
+
+    values = stacked[stat_cols]
+    trailing = _trailing_ewma(values, [stacked['fighter']], decay_factor).where(values.notna())
+
+    # Appearances without any earlier value carry no information (the fighter's debut)
+    trailing = pd.concat([stacked[['fighter', 'event_date', 'row']], trailing], axis=1)
+    trailing = trailing[trailing[stat_cols].notna().any(axis=1) & trailing['event_date'].notna()]
+    # Ties within an event (several bouts on one card) in chain order, so the lookup takes the last one
+    trailing = trailing.sort_values(by=['event_date', 'fighter', 'row'], kind='stable').drop(columns='row')
+
+    # Latest appearance strictly before the event of each target row, for both corners
+    new_columns = {}
+    for corner, cols in zip(CORNERS, (red_stat_cols, blue_stat_cols)):
+        lookup = pd.DataFrame({
+            'fighter': target[f'{corner}_fighter_name'].to_numpy(),
+            'event_date': target['event_date'].to_numpy(),
+            'row': np.arange(len(target)),
+        })
+        lookup = lookup[lookup['event_date'].notna()].sort_values(by='event_date', kind='stable')
+        matched = pd.merge_asof(lookup, trailing, on='event_date', by='fighter',
+                                allow_exact_matches=False, direction='backward')
+        matched = matched.set_index('row').reindex(np.arange(len(target)))
+        for col in cols:
+            new_columns[f"{col}_weighted_trailing"] = matched[col[len(corner) + 1:]].fillna(0).to_numpy()
+
+    trailing_df = pd.DataFrame(new_columns, index=target.index)
+    return pd.concat([target, trailing_df], axis=1)
+
+# Career stats of a fighter before a fight, in the column order of the notebook
+CAREER_STATS = ['avg_fight_time', 'defense', 'striking_accuracy', 'strikes_landed_per_min',
+                'strikes_absorbed_per_min', 'takedown_accuracy', 'takedown_defense', 'takedowns_per_15',
+                'submission_per_15', 'wins', 'losses', 'last_fight_days']
+
+# Running totals behind the career stats
+CAREER_TOTALS = ['fights', 'time', 'strikes_landed', 'strikes_attempted', 'strikes_received', 'td_landed',
+                 'td_attempted', 'td_defended', 'td_attempted_against', 'submissions', 'wins']
+
+def fight_ids(df: pd.DataFrame) -> pd.Series:
+    """The 'fight_id' column, or one id per (event_date, red_fighter_name, blue_fighter_name) in chronological order"""
+    if 'fight_id' in df.columns:
+        return df['fight_id']
+    return df.groupby(['event_date', 'red_fighter_name', 'blue_fighter_name'], observed=True).ngroup()
+
+def add_days_since_last_fight(df: pd.DataFrame, history: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Add '{corner}_fighter_days_since_last' columns: days between each fight
+    and the fighter's previous fight, 0 for their first one. With `history`
+    (e.g. the training set when `df` holds upcoming bouts) the fights of
+    `history` count as earlier fights too.
+
+    Computed with a grouped diff over the fight-level, corner-stacked view
+    (one row per fight and fighter), then broadcast to every round.
+    """
+    frames = [df] if history is None else [history, df]
+    parts = []
+    for source, frame in enumerate(frames):
+        ids = fight_ids(frame).to_numpy()
+        for corner in CORNERS:
+            parts.append(pd.DataFrame({
+                'source': source,
+                'fight_id': ids,
+                'corner': corner,
+                'fighter': frame[f'{corner}_fighter_name'].to_numpy(),
+                'event_date': frame['event_date'].to_numpy(),
+            }))
+    fights = pd.concat(parts, ignore_index=True).drop_duplicates(subset=['source', 'fight_id', 'corner'])
+    fights = fights.sort_values(by=['fighter', 'event_date', 'source', 'fight_id'], kind='stable')
+
+    days = fights['event_date'].groupby(fights['fighter']).diff().dt.days.fillna(0).astype(int)
+    days.index = pd.MultiIndex.from_arrays([fights['source'], fights['corner'], fights['fight_id']])
+    days = days.sort_index()
+
+    ids = fight_ids(df).to_numpy()
+    new_columns = {}
+    for corner in CORNERS:
+        new_columns[f'{corner}_fighter_days_since_last'] = days.loc[len(frames) - 1, corner].reindex(ids).to_numpy()
+    return pd.concat([df, pd.DataFrame(new_columns, index=df.index)], axis=1)
+
+# Per-round counts of a corner that add up over a fight: strikes and takedowns landed/attempted,
+# knockdowns, submission attempts, reversals and control time
+ROUND_COUNT_PATTERN = r'^(red|blue)_(?!fighter_)(.*_(landed|attempted)|kd|sub_att|rev|ctrl)$'
+
+def aggregate_rounds(rounds: pd.DataFrame, key='fight_url') -> pd.DataFrame:
+    """
+    Fight-level stats of a per-round frame, one row per fight (`key` column
+    or array of fight keys, in order of appearance): the number of 'rounds',
+    the sum over all rounds of every per-round count (ROUND_COUNT_PATTERN),
+    the best round of every landed count ('{col}_round_max') and the accuracy
+    of every landed/attempted pair ('{corner}_{stat}_rate', 0 without attempts).
+    """
+    keys = rounds[key].to_numpy() if isinstance(key, str) else np.asarray(key)
+    counts = [col for col in rounds.columns if re.match(ROUND_COUNT_PATTERN, col)]
+    landed = [col for col in counts if col.endswith('_landed')]
+    grouped = rounds[counts].groupby(keys, sort=False)
+    sums = grouped.sum()
+
+    rates = {}
+    for col in landed:
+        stat = col[:-len('_landed')]
+        if f'{stat}_attempted' in sums.columns:
+            attempted = sums[f'{stat}_attempted']
+            rates[f'{stat}_rate'] = (sums[col] / attempted).where(attempted > 0, 0)
+    return pd.concat([
+        grouped.size().rename('rounds'),
+        sums,
+        grouped[landed].max().add_suffix('_round_max'),
+        pd.DataFrame(rates, index=sums.index),
+    ], axis=1)
+
+# Fight details that are the same for every round of a fight
+FIGHT_COLUMNS = ['event_date', 'red_fighter_name', 'blue_fighter_name', 'red_fighter_win', 'final_time']
+
+# Per-round counts behind the career totals
+CAREER_ROUND_COUNTS = ['sig_str_landed', 'sig_str_attempted', 'td_landed', 'td_attempted', 'sub_att']
+
+def fight_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fight-level view of a per-round frame: one row per fight, in order of
+    appearance, with its 'fight_id' (also the index, see fight_ids), the
+    FIGHT_COLUMNS of its last round and the aggregate_rounds stats of its rounds
+    """
+    ids = fight_ids(df).to_numpy()
+    fights = df.groupby(ids, sort=False)[[col for col in FIGHT_COLUMNS if col in df.columns]].last()
+    fights.insert(0, 'fight_id', fights.index)
+    return pd.concat([fights, aggregate_rounds(df, ids)], axis=1)
+
+def corner_totals(fights: pd.DataFrame) -> pd.DataFrame:
+    """
+    Corner-stacked totals of a fight table (see fight_table): one row per
+    fight and fighter with the time, strike, takedown and submission totals
+    over all rounds, and whether they won
+    """
+    parts = []
+    for corner, opponent in zip(CORNERS, reversed(CORNERS)):
+        red_win = fights['red_fighter_win'].astype(bool)
+        parts.append(pd.DataFrame({
+            'fight_id': fights['fight_id'],
+            'corner': corner,
+            # Plain names, so the result merges with frames whose names are not categorical
+            'fighter': fights[f'{corner}_fighter_name'].astype(object),
+            'event_date': fights['event_date'],
+            'fights': 1,
+            # final_time is the time of the last round, counted for every round like the notebook did
+            'time': fights['final_time'] * fights['rounds'],
+            'strikes_landed': fights[f'{corner}_sig_str_landed'],
+            'strikes_attempted': fights[f'{corner}_sig_str_attempted'],
+            'strikes_received': fights[f'{opponent}_sig_str_landed'],
+            'td_landed': fights[f'{corner}_td_landed'],
+            'td_attempted': fights[f'{corner}_td_attempted'],
+            'td_defended': fights[f'{opponent}_td_attempted'] - fights[f'{opponent}_td_landed'],
+            'td_attempted_against': fights[f'{opponent}_td_attempted'],
+            'submissions': fights[f'{corner}_sub_att'],
+            'wins': (red_win if corner == 'red' else ~red_win).astype(int),
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+def fight_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fight-level, corner-stacked totals of a per-round frame (see corner_totals).
+    Fight details come from the last round.
+    """
+    counts = [f'{corner}_{stat}' for corner in CORNERS for stat in CAREER_ROUND_COUNTS]
+    return corner_totals(fight_table(df[[col for col in FIGHT_COLUMNS + ['fight_id'] if col in df.columns] + counts]))
+
+def _career_stats(totals: pd.DataFrame, last_fight_date: pd.Series, event_date: pd.Series) -> pd.DataFrame:
+    """Career stats from running totals (NaN totals: no earlier fights)"""
+    totals = totals.fillna(0)
+    minutes = totals['time'] / 60
+
+    def ratio(numerator, denominator, scale=1):
+        return ((numerator / denominator) * scale).where(denominator > 0, 0)
+
+    stats = pd.DataFrame({
+        'avg_fight_time': ratio(totals['time'], totals['fights']),
+        'defense': (1 - totals['strikes_received'] / totals['strikes_attempted']).where(
+            totals['strikes_attempted'] > 0, 0),
+        'striking_accuracy': ratio(totals['strikes_landed'], totals['strikes_attempted']),
+        'strikes_landed_per_min': ratio(totals['strikes_landed'], minutes),
+        'strikes_absorbed_per_min': ratio(totals['strikes_received'], minutes),
+        'takedown_accuracy': ratio(totals['td_landed'], totals['td_attempted']),
+        'takedown_defense': ratio(totals['td_defended'], totals['td_attempted_against']),
+        'takedowns_per_15': ratio(totals['td_landed'], minutes, 15),
+        'submission_per_15': ratio(totals['submissions'], minutes, 15),
+        'wins': totals['wins'].astype(int),
+        'losses': (totals['fights'] - totals['wins']).astype(int),
+        'last_fight_days': (event_date - last_fight_date).dt.days,
+    }, index=totals.index)
+    return stats[CAREER_STATS]
+
+def fight_career_stats(fights: pd.DataFrame) -> pd.DataFrame:
+    """
+    '{corner}_fighter_{stat}' career stats (CAREER_STATS) of both fighters
+    before every fight of a fight table (see fight_table), indexed like it
+    """
+    totals = corner_totals(fights).sort_values(by=['fighter', 'event_date', 'fight_id'], kind='stable')
+    running = totals[CAREER_TOTALS].groupby(totals['fighter']).cumsum()
+
+    # Totals before each fight: the running totals up to the fighter's previous fight
+    before = running.groupby(totals['fighter']).shift(1)
+    last_fight_date = totals['event_date'].groupby(totals['fighter']).shift(1)
+    stats = _career_stats(before, last_fight_date, totals['event_date'])
+    stats.index = pd.MultiIndex.from_arrays([totals['corner'], totals['fight_id']])
+
+    new_columns = {}
+    for corner in CORNERS:
+        corner_stats = stats.loc[corner].reindex(fights['fight_id'].to_numpy())
+        for col in CAREER_STATS:
+            new_columns[f'{corner}_fighter_{col}'] = corner_stats[col].to_numpy()
+    return pd.DataFrame(new_columns, index=fights.index)
+
+def add_career_stats(history: pd.DataFrame, target: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Add '{corner}_fighter_{stat}' columns for every stat in CAREER_STATS: the
+    career stats of each fighter over all their fights before the current one
+    (earlier events, or earlier fights of the same event).
+
+    The stats come from one chronological pass of running totals per fighter
+    over the fight-level totals of `history`. With `target` (e.g. upcoming
+    bouts) the stats are those after the fighter's last fight in `history`
+    before the event_date of each target row. Fighters without earlier fights
+    get 0, and no last_fight_days.
+    """
+    new_columns = {}
+    if target is None:
+        career = fight_career_stats(fight_table(history)).reindex(fight_ids(history).to_numpy())
+        for col in career.columns:
+            new_columns[col] = career[col].to_numpy()
+        target = history
+    else:
+        totals = fight_totals(history).sort_values(by=['fighter', 'event_date', 'fight_id'], kind='stable')
+        running = totals[CAREER_TOTALS].groupby(totals['fighter']).cumsum()
+        after = pd.concat([totals[['fighter', 'event_date']], running], axis=1)
+        after = after[after['event_date'].notna()].sort_values(by='event_date', kind='stable')
+        after = after.rename(columns={'event_date': 'last_fight_date'})
+        after['event_date'] = after['last_fight_date']
+        # Same key type on both sides, whatever the names of history and target are stored as
+        after['fighter'] = after['fighter'].astype(str)
+        for corner in CORNERS:
+            lookup = pd.DataFrame({
+                'fighter': target[f'{corner}_fighter_name'].to_numpy(),
+                'event_date': target['event_date'].to_numpy(),
+                'row': np.arange(len(target)),
+            })
+            lookup['fighter'] = lookup['fighter'].astype(str)
+            lookup = lookup[lookup['event_date'].notna()].sort_values(by='event_date', kind='stable')
+            matched = pd.merge_asof(lookup, after, on='event_date', by='fighter',
+                                    allow_exact_matches=False, direction='backward')
+            matched = matched.set_index('row').reindex(np.arange(len(target)))
+            stats = _career_stats(matched[CAREER_TOTALS], matched['last_fight_date'],
+                                  pd.Series(target['event_date'].to_numpy()))
+            for col in CAREER_STATS:
+                new_columns[f'{corner}_fighter_{col}'] = stats[col].to_numpy()
+
+    return pd.concat([target, pd.DataFrame(new_columns, index=target.index)], axis=1)
@@ -0,0 +1,92 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+DEFAULT_STORE_PATH = os.path.join('data', 'fighter_profiles.sqlite')
+DEFAULT_TTL_DAYS = 90
+
+class FighterStore:
+    """
+    Persistent fighter profile store keyed by fighter_link.
+
+    Profiles (height, weight, reach, stance, dob) are fetched at most once per
+    fighter and reused by every fight they appear in. Entries older than
+    `ttl_days` are fetched again; with `refresh=True` every fighter is fetched
+    again once during this run, whatever the age of the stored profile.
+    """
+    def __init__(self, path: str = DEFAULT_STORE_PATH, ttl_days: float = DEFAULT_TTL_DAYS, refresh: bool = False):
+        self.path = path
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+        self.refresh = refresh
+        self.refreshed = set()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS fighters (
+                fighter_link TEXT PRIMARY KEY,
+                details TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, fighter_link: str) -> Optional[Dict]:
+        """Return the stored profile if it is fresh enough, otherwise None"""
+        if self.refresh and fighter_link not in self.refreshed:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT details, fetched_at FROM fighters WHERE fighter_link = ?", (fighter_link,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def put(self, fighter_link: str, details: Dict) -> None:
+        """Store a freshly fetched profile"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fighters (fighter_link, details, fetched_at) VALUES (?, ?, ?)",
+                (fighter_link, json.dumps(details), time.time())
+            )
+            self.conn.commit()
+            self.refreshed.add(fighter_link)
+
+    def get_many(self, fighter_links: Iterable[str], loader: Callable[[str], Dict]) -> Dict[str, Dict]:
+        """
+        Resolve a batch of fighter links to their profiles. Links are
+        deduplicated first, so each missing or stale fighter is fetched with
+        `loader` exactly once, and everything else is served from the store.
+        """
+        unique_links = list(dict.fromkeys(link for link in fighter_links if link))
+        profiles = {}
+        missing = []
+        for link in unique_links:
+            details = self.get(link)
+            if details is None:
+                missing.append(link)
+            else:
+                profiles[link] = details
+        self.hits += len(profiles)
+        self.misses += len(missing)
+
+        for link in missing:
+            details = loader(link)
+            # Failed fetches come back empty, don't store them so they are retried next time
+            if details:
+                self.put(link, details)
+            profiles[link] = details
+        return profiles
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,177 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ufc_cache import ResponseCache, conditional_headers
+
+# (connect, read) timeout in seconds for every request
+DEFAULT_TIMEOUT: Tuple[float, float] = (5, 30)
+
+# Status codes that are worth retrying with exponential backoff
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; ufc-stats-scraper)',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Optional on-disk response cache used by fetch_html, see configure_cache
+_cache: Optional[ResponseCache] = None
+_offline = False
+
+class CacheMiss(requests.RequestException):
+    """Raised in offline mode when a URL is not in the response cache"""
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows bursts of up to `capacity` requests and
+    refills at `rate` tokens per second.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then consume it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+class HostRateLimiter:
+    """Keeps one TokenBucket per host so every host gets its own request budget"""
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        """Block until a request to the host of `url` is allowed"""
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self.buckets[host] = bucket
+        bucket.acquire()
+
+def create_session(pool_size: int = 20, retries: int = 5, backoff_factor: float = 0.5) -> requests.Session:
+    """
+    Create a requests session with connection pooling, keep-alive and
+    exponential-backoff retries on 429/5xx responses and connection errors
+
+    Parameters:
+    pool_size (int): Number of pooled connections kept open per host
+    retries (int): Maximum number of retries per request
+    backoff_factor (float): Base delay for the exponential backoff (0.5 -> 0.5s, 1s, 2s, ...)
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_session() -> requests.Session:
+    """Return the shared session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def fetch(url: str, timeout: Tuple[float, float] = DEFAULT_TIMEOUT) -> requests.Response:
+    """
+    GET a URL through the shared session. Raises requests.RequestException
+    (including HTTPError for non-2xx responses) once the retries are exhausted.
+    """
+    response = get_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+def configure_cache(cache: Optional[ResponseCache], offline: bool = False) -> None:
+    """
+    Install (or remove, with None) the response cache used by fetch_html
+
+    Parameters:
+    cache (ResponseCache, optional): Cache to serve and store responses
+    offline (bool): Serve everything from the cache and never touch the network
+    """
+    global _cache, _offline
+    if offline and cache is None:
+        raise ValueError("Offline mode requires a response cache")
+    _cache = cache
+    _offline = offline
+
+def fetch_html(url: str, timeout: Tuple[float, float] = DEFAULT_TIMEOUT, immutable: bool = False) -> str:
+    """
+    GET a URL through the shared session and return the decoded body.
+
+    When a response cache is configured, immutable pages (e.g. completed
+    events and fights) are served straight from it, other cached pages are
+    revalidated with ETag / Last-Modified, and in offline mode nothing goes
+    over the network at all.
+
+    Parameters:
+    url (str): URL to fetch
+    timeout (Tuple[float, float]): (connect, read) timeout in seconds
+    immutable (bool): The page never changes once fetched, so a cached copy is always valid
+    """
+    if _cache is None:
+        return fetch(url, timeout=timeout).text
+
+    entry = _cache.get(url)
+    if entry is not None and (entry.immutable or immutable or _offline):
+        return entry.text
+    if _offline:
+        raise CacheMiss(f"{url} is not in the response cache (offline mode)")
+
+    headers = conditional_headers(entry) if entry is not None else {}
+    response = get_session().get(url, timeout=timeout, headers=headers)
+    if entry is not None and response.status_code == 304:
+        _cache.touch(url, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return entry.text
+    response.raise_for_status()
+
+    _cache.put(
+        url,
+        response.content,
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+        immutable=immutable
+    )
+    return response.text
@@ -0,0 +1,152 @@
+import re
+from typing import Dict, List, Optional
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+# Use the much faster lxml tree builder when it is installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Precompiled selectors, shared by every page
+ROUND_HEAD_SELECTOR = soupsieve.compile('thead.b-fight-details__table-row_type_head')
+ROUND_TITLE_PATTERN = re.compile(r'^Round\s+(\d+)$')
+
+# Column layout of the per-round "Totals" table (column 0 holds the fighter names)
+TOTALS_COLUMNS = [
+    (1, 'kd', 'raw'),
+    (2, 'sig_str', 'split'),
+    (3, 'sig_str_pct', 'pct'),
+    (4, 'total_str', 'split'),
+    (5, 'td', 'split'),
+    (6, 'td_pct', 'pct'),
+    (7, 'sub_att', 'raw'),
+    (8, 'rev', 'raw'),
+    (9, 'ctrl', 'raw'),
+]
+
+# Column layout of the per-round "Significant Strikes" table
+SIG_STRIKES_COLUMNS = [
+    (1, 'sig_str', 'split'),
+    (2, 'sig_str_pct', 'pct'),
+    (3, 'head', 'split'),
+    (4, 'body', 'split'),
+    (5, 'leg', 'split'),
+    (6, 'distance', 'split'),
+    (7, 'clinch', 'split'),
+    (8, 'ground', 'split'),
+]
+
+def make_soup(html_content: str) -> BeautifulSoup:
+    """Parse a page with the fastest available tree builder"""
+    return BeautifulSoup(html_content, HTML_PARSER)
+
+def _cell_values(cell) -> List[str]:
+    """Text of the <p> elements of a table cell, one per fighter (red first)"""
+    return [p.get_text(strip=True) for p in cell.find_all('p')]
+
+def _add_columns(round_stats: Dict, cells, columns, round_num: int) -> None:
+    for idx, name, kind in columns:
+        values = _cell_values(cells[idx])
+        if len(values) < 2:
+            continue
+        for prefix, value in zip(['red', 'blue'], values):
+            if kind == 'split':
+                parts = value.split('of')
+                if len(parts) == 2:
+                    round_stats[f'{prefix}_r{round_num}_{name}_landed'] = parts[0].strip()
+                    round_stats[f'{prefix}_r{round_num}_{name}_attempted'] = parts[1].strip()
+            elif kind == 'pct':
+                round_stats[f'{prefix}_r{round_num}_{name}'] = value.replace('%', '')
+            else:
+                round_stats[f'{prefix}_r{round_num}_{name}'] = value
+
+def parse_round_tables(soup: BeautifulSoup) -> Dict:
+    """
+    Parse the per-round Totals and Significant Strikes tables of a fight page
+    in a single walk over the round headers.
+
+    Returns the same keys scrape_fight_data used to build from
+    extract_round_stats (rounds 1-5) and scrape_significant_strikes_per_round:
+    '{red|blue}_r{N}_{stat}' for every round and both corners.
+    """
+    round_stats = {}
+    totals_rounds = set()
+    sig_rounds = set()
+
+    for header in ROUND_HEAD_SELECTOR.select(soup):
+        match = ROUND_TITLE_PATTERN.match(header.get_text(strip=True))
+        if not match:
+            continue
+        round_num = int(match.group(1))
+
+        stats_row = header.find_next('tr', class_='b-fight-details__table-row')
+        if stats_row is None:
+            continue
+        cells = stats_row.find_all('td', class_='b-fight-details__table-col')
+
+        # The Totals table has 10 columns, the Significant Strikes table 9
+        if len(cells) >= 10 and round_num not in totals_rounds:
+            totals_rounds.add(round_num)
+            _add_columns(round_stats, cells, TOTALS_COLUMNS, round_num)
+        elif len(cells) == 9 and round_num not in sig_rounds:
+            sig_rounds.add(round_num)
+            _add_columns(round_stats, cells, SIG_STRIKES_COLUMNS, round_num)
+
+    return round_stats
+
+def has_significant_strikes(round_stats: Dict) -> bool:
+    """Whether the parsed round stats include the per-round Significant Strikes table"""
+    return any(key.endswith('_head_landed') for key in round_stats)
+
+def parse_fight_preview(html_content: str) -> Dict:
+    """
+    Parse the matchup page of a scheduled fight: weight class, fighter
+    nicknames and links, and the tale-of-the-tape stat rows as
+    'fighter{1|2}_{stat}'. Module level, so it can run in a process pool.
+    """
+    soup = make_soup(html_content)
+    fight_data = {}
+
+    # Get weight class from the fight details section
+    weight_class = soup.select_one('i.b-fight-details__fight-title')
+    fight_data['weight_class'] = weight_class.text.strip() if weight_class else None
+
+    # Get fighter nicknames
+    nicknames = soup.select('p.b-fight-details__person-title')
+    fight_data['fighter1_nickname'] = nicknames[0].text.strip() if len(nicknames) > 0 else None
+    fight_data['fighter2_nickname'] = nicknames[1].text.strip() if len(nicknames) > 1 else None
+
+    # Get fighter links
+    fighter_links = soup.select('h3.b-fight-details__person-name a')
+    fight_data['fighter1_link'] = fighter_links[0]['href'] if len(fighter_links) > 0 else None
+    fight_data['fighter2_link'] = fighter_links[1]['href'] if len(fighter_links) > 1 else None
+
+    # Get all stat rows
+    for row in soup.select('tr.b-fight-details__table-row-preview'):
+        # Get stat name
+        stat_name = row.select_one('td.l-page_align_left p.b-fight-details__table-text')
+        if stat_name:
+            stat_name = stat_name.text.strip().lower().replace(' ', '_').replace('.', '')
+
+            # Get values for both fighters
+            values = row.select('td:not(.l-page_align_left) p.b-fight-details__table-text')
+            if len(values) >= 2:
+                fight_data[f'fighter1_{stat_name}'] = values[0].text.strip()
+                fight_data[f'fighter2_{stat_name}'] = values[1].text.strip()
+
+    return fight_data
+
+def try_parse_fight_preview(fight_link: str, html_content: str) -> Optional[Dict]:
+    """
+    parse_fight_preview that logs a malformed page and returns None instead of
+    raising, so one bad page doesn't abort the rest of the card
+    """
+    try:
+        return parse_fight_preview(html_content)
+    except Exception as e:
+        print(f"Error parsing fight {fight_link}: {e}")
+        return None
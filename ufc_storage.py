@@ -0,0 +1,301 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+
+class ExcelStore:
+    """
+    Single .xlsx workbook. Every append rewrites the whole file, so this is
+    only meant as an export format or for small files.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def columns(self) -> List[str]:
+        if not self.exists():
+            return []
+        return pd.read_excel(self.path, nrows=0).columns.tolist()
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if not self.exists():
+            return pd.DataFrame(columns=columns)
+        return pd.read_excel(self.path, usecols=columns)
+
+    def append(self, df: pd.DataFrame) -> None:
+        if self.exists():
+            df = pd.concat([self.read(), df], ignore_index=True)
+        self.overwrite(df)
+
+    def signature(self) -> str:
+        """Changes whenever the workbook is rewritten"""
+        if not self.exists():
+            return ''
+        stat = os.stat(self.path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def overwrite(self, df: pd.DataFrame) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        df.to_excel(self.path, index=False)
+
+    def __str__(self) -> str:
+        return self.path
+
+class ParquetStore:
+    """
+    Append-only Parquet dataset: a directory of part files, one per append,
+    optionally hive-partitioned by `partition_cols`. Appends never rewrite
+    existing data and reads only load the requested columns.
+    """
+    def __init__(self, path: str, partition_cols: Optional[List[str]] = None):
+        self.path = path
+        self.partition_cols = partition_cols
+
+    def _part_files(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.path, '**', '*.parquet'), recursive=True))
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.path) and len(self._part_files()) > 0
+
+    def signature(self) -> str:
+        """Changes whenever a part file is added or removed"""
+        parts = [f"{os.path.relpath(path, self.path)}:{os.path.getsize(path)}" for path in self._part_files()]
+        return hashlib.sha256('\n'.join(parts).encode()).hexdigest() if parts else ''
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.path, format='parquet', partitioning='hive')
+        # Part files written by different runs may disagree on column sets, on all-null
+        # columns or on string vs large_string, so read them with a unified schema
+        schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+        if dataset.partitioning is not None:
+            schemas.append(dataset.partitioning.schema)
+        schema = pa.unify_schemas(schemas, promote_options='permissive')
+        return ds.dataset(self.path, schema=schema, format='parquet', partitioning='hive')
+
+    def columns(self) -> List[str]:
+        if not self.exists():
+            return []
+        return self._dataset().schema.names
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if not self.exists():
+            return pd.DataFrame(columns=columns)
+        dataset = self._dataset()
+        if columns is not None:
+            missing = [col for col in columns if col not in dataset.schema.names]
+            if missing:
+                raise KeyError(f"Columns {missing} not found in {self.path}")
+        return dataset.to_table(columns=columns).to_pandas()
+
+    def append(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        # Time-ordered file names keep the rows in append order when the dataset is read back
+        basename = f'part-{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+        if self.partition_cols:
+            df.to_parquet(self.path, index=False, partition_cols=self.partition_cols,
+                          basename_template=basename + '-{i}.parquet')
+        else:
+            # Write under a temporary name and rename, so a crash never leaves a half-written part file.
+            # The name starts with '.', so pyarrow.dataset skips a leftover one when reading.
+            path = os.path.join(self.path, basename + '.parquet')
+            tmp_path = os.path.join(self.path, f'.{basename}.parquet.tmp')
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+
+    def overwrite(self, df: pd.DataFrame) -> None:
+        # Write the new data next to the old one first, then swap directories
+        tmp_path = f"{self.path}.tmp-{uuid.uuid4().hex}"
+        ParquetStore(tmp_path, self.partition_cols).append(df)
+        os.makedirs(tmp_path, exist_ok=True)
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(tmp_path, self.path)
+
+    def __str__(self) -> str:
+        return self.path
+
+class IndexedStore:
+    """
+    Wraps a data store with a persistent SQLite sidecar index
+    (`<path>.keys.sqlite`) of the values of its key columns, e.g. event and
+    fight links. "Already have it?" lookups are answered from the index
+    without reading the data itself.
+
+    The index is updated in one transaction after every write through this
+    wrapper. It also remembers the store signature it was built against, so
+    if the data changed behind its back (or an update was interrupted) the
+    affected columns are rebuilt from the store on the next lookup.
+    """
+    def __init__(self, store, key_columns: List[str]):
+        self.store = store
+        self.path = store.path
+        self.key_columns = key_columns
+        self.index_path = f"{store.path}.keys.sqlite"
+
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.index_path)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS keys (
+                    column_name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (column_name, key)
+                ) WITHOUT ROWID
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS columns (
+                    column_name TEXT PRIMARY KEY,
+                    signature TEXT NOT NULL
+                )
+            """)
+
+    def _indexed_signature(self, column: str) -> Optional[str]:
+        row = self.conn.execute("SELECT signature FROM columns WHERE column_name = ?", (column,)).fetchone()
+        return row[0] if row else None
+
+    def _rebuild(self, column: str, signature: str) -> None:
+        print(f"Building key index for '{column}' of {self.store}")
+        values = []
+        if self.store.exists() and column in self.store.columns():
+            values = self.store.read(columns=[column])[column].dropna().astype(str).unique()
+        with self.conn:
+            self.conn.execute("DELETE FROM keys WHERE column_name = ?", (column,))
+            self.conn.executemany("INSERT OR IGNORE INTO keys (column_name, key) VALUES (?, ?)",
+                                  ((column, value) for value in values))
+            self.conn.execute("INSERT OR REPLACE INTO columns (column_name, signature) VALUES (?, ?)",
+                              (column, signature))
+
+    def keys(self, column: str) -> Set[str]:
+        """All stored values of a key column"""
+        signature = self.store.signature()
+        if self._indexed_signature(column) != signature:
+            self._rebuild(column, signature)
+        return {row[0] for row in self.conn.execute("SELECT key FROM keys WHERE column_name = ?", (column,))}
+
+    def _record(self, df: pd.DataFrame, before: str, replace: bool) -> None:
+        after = self.store.signature()
+        with self.conn:
+            for column in self.key_columns:
+                # A stale index is left alone and rebuilt on the next lookup
+                if not replace and self._indexed_signature(column) != before:
+                    continue
+                if replace:
+                    self.conn.execute("DELETE FROM keys WHERE column_name = ?", (column,))
+                if column in df.columns:
+                    self.conn.executemany("INSERT OR IGNORE INTO keys (column_name, key) VALUES (?, ?)",
+                                          ((column, value) for value in df[column].dropna().astype(str).unique()))
+                self.conn.execute("INSERT OR REPLACE INTO columns (column_name, signature) VALUES (?, ?)",
+                                  (column, after))
+
+    def exists(self) -> bool:
+        return self.store.exists()
+
+    def columns(self) -> List[str]:
+        return self.store.columns()
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return self.store.read(columns=columns)
+
+    def signature(self) -> str:
+        return self.store.signature()
+
+    def append(self, df: pd.DataFrame) -> None:
+        before = self.store.signature()
+        self.store.append(df)
+        self._record(df, before, replace=False)
+
+    def overwrite(self, df: pd.DataFrame) -> None:
+        before = self.store.signature()
+        self.store.overwrite(df)
+        self._record(df, before, replace=True)
+
+    def __str__(self) -> str:
+        return str(self.store)
+
+class Checkpoint:
+    """
+    Resume cursor of a long-running job, stored as a small JSON file that is
+    replaced atomically on every save.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return {}
+
+    def save(self, state: Dict) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def _seed_text(value) -> Optional[str]:
+    """Text of an Excel cell as the scraper would have written it ('12', not '12.0'), None when empty"""
+    if pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def open_store(path: str, seed_from: Optional[str] = None, partition_cols: Optional[List[str]] = None,
+               key_columns: Optional[List[str]] = None):
+    """
+    Open the data store at `path`: an ExcelStore for .xlsx files, otherwise a
+    ParquetStore directory. When the Parquet dataset does not exist yet but
+    the Excel file `seed_from` does, its rows are imported once. With
+    `key_columns` the store is wrapped in an IndexedStore.
+    """
+    if path.endswith('.xlsx'):
+        store = ExcelStore(path)
+        return IndexedStore(store, key_columns) if key_columns else store
+
+    store = ParquetStore(path, partition_cols=partition_cols)
+    if not store.exists() and seed_from and os.path.exists(seed_from):
+        print(f"Importing {seed_from} into {path}")
+        seed = pd.read_excel(seed_from)
+        # The scrapers append text, so every column is stored as text: numbers (including all-empty
+        # columns read as float) would clash with the appended strings when the part files are unified
+        for col in seed.columns:
+            if not pd.api.types.is_datetime64_any_dtype(seed[col]):
+                seed[col] = seed[col].map(_seed_text)
+        store.append(seed)
+    return IndexedStore(store, key_columns) if key_columns else store
+
+def export_excel(store, output_file: str) -> None:
+    """Write the full contents of a store to an Excel workbook"""
+    store.read().to_excel(output_file, index=False)
+    print(f"Exported {store} to {output_file}")